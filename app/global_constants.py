@@ -49,3 +49,12 @@ class TopicConstants(int, Enum):
 class RoleConstants(int, Enum):
     SUPER_ADMIN = 1
     USER = 2
+
+
+# Google Alert RSS feeds used for the "Trends to Watch" section, keyed by topic id
+TOPIC_TRENDS_RSS_URLS = {
+    TopicConstants.AI.value: "https://www.google.com/alerts/feeds/05623958380462213229/7509269760615483402",
+    TopicConstants.BLOCKCHAIN.value: "https://www.google.com/alerts/feeds/05623958380462213229/6397280906166700581",
+    TopicConstants.CYBERSECURITY.value: "https://www.google.com/alerts/feeds/05623958380462213229/1739904053101697444",
+    TopicConstants.IOT.value: "https://www.google.com/alerts/feeds/05623958380462213229/5112460639121574802",
+}
@@ -15,3 +15,6 @@ class MailConfig(AppConfig):
 
         from app.mail.scheduler import start_scheduler
         threading.Thread(target=start_scheduler, daemon=True).start()
+
+        from app.mail.outbox import start_outbox_workers
+        start_outbox_workers()
@@ -0,0 +1,48 @@
+import hashlib
+import zlib
+
+from app.mail.models import EmailBody
+
+COMPRESSION_LEVEL = 6
+
+
+def html_digest(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def store_email_bodies(html_contents):
+    """
+    EmailBody of each HTML, in order. Identical HTML shares one row, bodies already stored are reused
+    so storage grows with the distinct newsletters and not with the recipients.
+    The compressed content is not loaded, EmailBody.html reads it when needed.
+    """
+    digests = [html_digest(html) for html in html_contents]
+    distinct = dict(zip(digests, html_contents))
+
+    bodies = {body.sha256: body for body in EmailBody.objects.filter(sha256__in=distinct).defer("content")}
+
+    missing = []
+    for digest, html in distinct.items():
+        if digest in bodies:
+            continue
+        encoded = html.encode("utf-8")
+        missing.append(EmailBody(sha256=digest, content=zlib.compress(encoded, COMPRESSION_LEVEL), size=len(encoded)))
+
+    if missing:
+        # Rows stored concurrently by another worker are skipped, their pks are read back with the new ones
+        EmailBody.objects.bulk_create(missing, ignore_conflicts=True)
+        bodies.update({
+            body.sha256: body
+            for body in EmailBody.objects.filter(sha256__in=[body.sha256 for body in missing]).defer("content")
+        })
+
+    return [bodies[digest] for digest in digests]
+
+
+def store_email_body(html):
+    return store_email_bodies([html])[0]
+
+
+def load_email_html(body_ids):
+    """Decompressed HTML of each body id, loading every distinct body once"""
+    return {body.pk: body.html for body in EmailBody.objects.filter(pk__in=set(body_ids))}
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.mail.email_bodies import store_email_bodies
+from app.mail.models import EmailLog
+
+
+class Command(BaseCommand):
+    help = "Move the HTML of email logs written before EmailBody existed into the deduplicated, compressed bodies"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        compacted = 0
+
+        while True:
+            with transaction.atomic():
+                email_logs = list(
+                    EmailLog.objects.filter(body__isnull=True).exclude(message="")
+                    .only("pk", "message").order_by("pk")[:options["batch_size"]]
+                )
+                if not email_logs:
+                    break
+
+                for email_log, body in zip(email_logs, store_email_bodies([log.message for log in email_logs])):
+                    email_log.body = body
+                    email_log.message = ""
+
+                EmailLog.objects.bulk_update(email_logs, ["body", "message"])
+
+            compacted += len(email_logs)
+            self.stdout.write(f"Compacted {compacted} email logs")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {compacted} email logs compacted"))
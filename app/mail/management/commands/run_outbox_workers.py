@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.mail.outbox import OutboxWorkerPool, process_outbox
+
+
+class Command(BaseCommand):
+    help = "Run email outbox delivery workers in the foreground, eg in their own process next to the web server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.EMAIL_OUTBOX['WORKERS'])
+        parser.add_argument("--batch-size", type=int, default=settings.EMAIL_OUTBOX['BATCH_SIZE'])
+        parser.add_argument("--once", action="store_true", help="Send the emails due now and exit")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            processed = 0
+            while True:
+                claimed = process_outbox(options["batch_size"])
+                processed += claimed
+                if claimed < options["batch_size"]:
+                    break
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} emails"))
+            return
+
+        pool = OutboxWorkerPool(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            poll_interval=settings.EMAIL_OUTBOX['POLL_INTERVAL'],
+        ).start()
+        self.stdout.write(self.style.SUCCESS(f"Started {options['workers']} outbox workers, Ctrl-C to stop"))
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pool.stop(timeout=settings.EMAIL_OUTBOX['CLAIM_TIMEOUT'])
@@ -1,10 +1,35 @@
+import zlib
+
 from django.db import models
+from django.utils import timezone
 
 from app.user.models import User
 
 
 # Create your models here.
 
+class EmailBody(models.Model):
+    """
+    Rendered HTML of an email, stored zlib compressed once per distinct content and
+    referenced by the outbox and log rows of every recipient and attempt.
+    """
+
+    #Field declarations
+    sha256 = models.CharField(max_length=64, unique=True)
+    content = models.BinaryField()
+    # bytes of the uncompressed UTF-8 HTML
+    size = models.PositiveIntegerField()
+
+    # Additional fields
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
+
+    @property
+    def html(self):
+        return zlib.decompress(self.content).decode("utf-8")
+
+
 class EmailLog(models.Model):
 
     #Foreign key declaration
@@ -14,10 +39,19 @@ class EmailLog(models.Model):
         related_name='email_logs',
         related_query_name='email_log'
     )
+    body = models.ForeignKey(
+        EmailBody,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='email_logs',
+        related_query_name='email_log'
+    )
 
     #Field declarations
     recipient = models.EmailField()
-    message = models.TextField()
+    # only set on rows logged before the bodies were stored in EmailBody
+    message = models.TextField(blank=True)
     status = models.CharField(max_length=50, choices=[
         ('SUCCESS', 'Success'),
         ('FAILED', 'Failed')
@@ -30,4 +64,57 @@ class EmailLog(models.Model):
     updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    @property
+    def html(self):
+        return self.body.html if self.body_id else self.message
+
+
+class OutboundEmail(models.Model):
+    """
+    Email waiting in the outbox, claimed and sent by the delivery workers.
+    Failed sends go back to PENDING with a later next_attempt_at until max_attempts is reached.
+    """
+
+    #Foreign key declaration
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='outbound_emails',
+        related_query_name='outbound_email'
+    )
+    body = models.ForeignKey(
+        EmailBody,
+        on_delete=models.PROTECT,
+        related_name='outbound_emails',
+        related_query_name='outbound_email'
+    )
+
+    #Field declarations
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=[
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed')
+    ], default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # earliest time a worker may claim it, a claimed email stays locked until it passes again
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    provider_message_id = models.CharField(max_length=255, blank=True, null=True)
+    # idempotency key of the provider batch request it was first sent in, retries resend the same batch under it
+    batch_key = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    error_message = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    # Additional fields
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Claim query of the delivery workers
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx'),
+        ]
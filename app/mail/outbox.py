@@ -0,0 +1,296 @@
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+
+import resend
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+from dotenv import load_dotenv
+
+from app.mail.email_bodies import store_email_bodies, load_email_html
+from app.mail.models import EmailLog, OutboundEmail
+
+logger = logging.getLogger('scheduler')
+
+load_dotenv()
+
+
+def enqueue_emails(emails):
+    """
+    Put emails in the outbox for the delivery workers, emails are dicts with
+    user_id, recipient, subject and html_content. Returns the created OutboundEmail rows.
+    Recipients of the same newsletter share its stored body.
+    """
+    max_attempts = settings.EMAIL_OUTBOX['MAX_ATTEMPTS']
+    bodies = store_email_bodies([email["html_content"] for email in emails])
+
+    outbound_emails = OutboundEmail.objects.bulk_create([
+        OutboundEmail(
+            user_id=email["user_id"],
+            body=body,
+            recipient=email["recipient"],
+            subject=email["subject"],
+            max_attempts=max_attempts,
+        )
+        for email, body in zip(emails, bodies)
+    ])
+
+    # Idle workers of this process pick them up without waiting for their next poll
+    transaction.on_commit(wake_outbox_workers)
+
+    return outbound_emails
+
+
+def enqueue_email(user_id, recipient, subject, html_content):
+    """Put a single email in the outbox, see enqueue_emails"""
+    return enqueue_emails([{
+        "user_id": user_id,
+        "recipient": recipient,
+        "subject": subject,
+        "html_content": html_content,
+    }])[0]
+
+
+def claim_due_emails(limit):
+    """
+    Lock up to limit due emails for this worker, rows locked by other workers are skipped.
+    The other due emails of the provider batches they were already sent in are claimed with them, past the limit,
+    so a batch is always retried whole.
+    A claimed email stays SENDING until it is sent or rescheduled, or is claimed again once CLAIM_TIMEOUT passes.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        due_emails = OutboundEmail.objects.select_for_update(skip_locked=True) \
+            .filter(status__in=['PENDING', 'SENDING'], next_attempt_at__lte=now, is_active=True)
+
+        emails = list(due_emails.order_by('next_attempt_at', 'pk')[:limit])
+
+        batch_keys = {email.batch_key for email in emails if email.batch_key}
+        if batch_keys:
+            emails += list(
+                due_emails.filter(batch_key__in=batch_keys).exclude(pk__in=[email.pk for email in emails])
+                .order_by('pk')
+            )
+
+        claimed_until = now + timedelta(seconds=settings.EMAIL_OUTBOX['CLAIM_TIMEOUT'])
+        for email in emails:
+            email.status = 'SENDING'
+            email.attempts += 1
+            email.next_attempt_at = claimed_until
+            email.updated = now
+
+        OutboundEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'updated'])
+
+    return emails
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt of an email that failed attempts times"""
+    return settings.EMAIL_OUTBOX['BACKOFF_SECONDS'] * 2 ** (attempts - 1)
+
+
+def mark_sent(emails, provider_message_ids):
+    """Record the emails accepted by the provider, in bulk"""
+    now = timezone.now()
+
+    for email, provider_message_id in zip(emails, provider_message_ids):
+        email.status = 'SENT'
+        email.sent_at = now
+        email.provider_message_id = provider_message_id
+        email.error_message = None
+        email.updated = now
+
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(emails, ['status', 'sent_at', 'provider_message_id', 'error_message', 'updated'])
+        EmailLog.objects.bulk_create([
+            EmailLog(user_id=email.user_id, body_id=email.body_id, recipient=email.recipient, status='SUCCESS')
+            for email in emails
+        ])
+
+    logger.info(f"[{now}] Sent {len(emails)} emails successfully")
+
+
+def mark_failed(emails, errors, retry=True):
+    """
+    Reschedule failed sends with backoff, errors holds the error of each email.
+    Emails that ran out of attempts, or all of them when retry is False, are given up and logged as FAILED.
+    The retried emails share one retry time.
+    """
+    now = timezone.now()
+    retried, given_up = [], []
+    retry_at = now + timedelta(seconds=retry_delay(max(email.attempts for email in emails)))
+
+    for email, error in zip(emails, errors):
+        email.error_message = str(error)
+        email.updated = now
+        if retry and email.attempts < email.max_attempts:
+            email.status = 'PENDING'
+            email.next_attempt_at = retry_at
+            retried.append(email)
+            logger.error(f"Attempt {email.attempts} of email {email.pk} failed: {str(error)}")
+        else:
+            email.status = 'FAILED'
+            given_up.append(email)
+            logger.error(f"[{now}] Email {email.pk} to {email.recipient} failed after {email.attempts} attempts.")
+
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(retried + given_up, ['status', 'next_attempt_at', 'error_message', 'updated'])
+        EmailLog.objects.bulk_create([
+            EmailLog(
+                user_id=email.user_id,
+                body_id=email.body_id,
+                recipient=email.recipient,
+                status='FAILED',
+                error_message=email.error_message
+            )
+            for email in given_up
+        ])
+
+
+def send_batch(emails):
+    """
+    Send emails in one Resend batch request and record the outcomes.
+    The batch is validated permissively, emails rejected by the provider fail for good without holding back the rest,
+    a failed request is retried for every email of the batch. The emails share the batch_key sent as idempotency key,
+    it lets the provider drop the retry of a request it had already accepted, eg when only the response timed out.
+    """
+    html_contents = load_email_html([email.body_id for email in emails])
+
+    try:
+        resend.api_key = os.getenv("RESEND_API_KEY")
+        response = resend.Batch.send(
+            [
+                {
+                    "from": settings.EMAIL_OUTBOX['FROM_EMAIL'],
+                    "to": email.recipient,
+                    "subject": email.subject,
+                    "html": html_contents[email.body_id]
+                }
+                for email in emails
+            ],
+            {"batch_validation": "permissive", "idempotency_key": emails[0].batch_key}
+        )
+    except Exception as e:
+        mark_failed(emails, [e] * len(emails))
+        return
+
+    # The accepted emails are listed in request order, the rejected ones by their index in the request
+    rejected = {error["index"]: error["message"] for error in response.get("errors") or []}
+    accepted = [email for index, email in enumerate(emails) if index not in rejected]
+    provider_message_ids = [item.get("id") for item in response.get("data") or []]
+
+    if accepted:
+        mark_sent(accepted, provider_message_ids + [None] * (len(accepted) - len(provider_message_ids)))
+    if rejected:
+        mark_failed([emails[index] for index in rejected], list(rejected.values()), retry=False)
+
+
+def deliver_emails(emails):
+    """
+    Send claimed emails through the Resend batch API. Emails already sent in a batch are sent again in the same batch
+    under the same key, the others are cut into new batches of PROVIDER_BATCH_SIZE.
+    Keys are stored before the requests go out, so a retry after a crash or a timeout reuses them.
+    """
+    batches, new_emails = {}, []
+    for email in emails:
+        if email.batch_key:
+            batches.setdefault(email.batch_key, []).append(email)
+        else:
+            new_emails.append(email)
+
+    batch_size = settings.EMAIL_OUTBOX['PROVIDER_BATCH_SIZE']
+    for start in range(0, len(new_emails), batch_size):
+        batch_key = f"outbox-{uuid.uuid4().hex}"
+        batches[batch_key] = new_emails[start:start + batch_size]
+        for email in batches[batch_key]:
+            email.batch_key = batch_key
+
+    if new_emails:
+        OutboundEmail.objects.bulk_update(new_emails, ['batch_key'])
+
+    for batch in batches.values():
+        send_batch(batch)
+
+
+def process_outbox(batch_size=None):
+    """Claim and send one batch of due emails, returns how many were claimed"""
+    emails = claim_due_emails(batch_size or settings.EMAIL_OUTBOX['BATCH_SIZE'])
+
+    deliver_emails(emails)
+
+    return len(emails)
+
+
+class OutboxWorkerPool:
+    """
+    Delivery worker threads draining the outbox. A worker keeps claiming batches while there are due emails,
+    then sleeps until woken by a new email or until the poll interval passes for due retries.
+    """
+
+    def __init__(self, workers, batch_size, poll_interval):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = process_outbox(self.batch_size)
+            except Exception as e:
+                logger.error(f"Outbox delivery failed: {e}")
+                claimed = 0
+            finally:
+                close_old_connections()
+
+            if claimed < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+def start_outbox_workers():
+    """Start the process wide delivery workers, once"""
+    global _workers
+
+    if _workers is None:
+        with _workers_lock:
+            if _workers is None:
+                _workers = OutboxWorkerPool(
+                    workers=settings.EMAIL_OUTBOX['WORKERS'],
+                    batch_size=settings.EMAIL_OUTBOX['BATCH_SIZE'],
+                    poll_interval=settings.EMAIL_OUTBOX['POLL_INTERVAL'],
+                ).start()
+                logger.info(f"Started {_workers.workers} email outbox workers")
+
+    return _workers
+
+
+def wake_outbox_workers():
+    if _workers is not None:
+        _workers.wake()
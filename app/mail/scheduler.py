@@ -3,10 +3,12 @@ import logging
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from dotenv import load_dotenv
 
-from app.mail.models import EmailLog
+from app.mail.outbox import enqueue_emails
 from app.newsletter.models import NewsletterSchedule
 
 logger = logging.getLogger('scheduler')
@@ -14,56 +16,67 @@ logger = logging.getLogger('scheduler')
 load_dotenv()
 
 
+def next_run(schedule):
+    """Move a schedule to its next run based on its frequency, a one time schedule is finished"""
+    if schedule.frequency == 'once':
+        schedule.is_active = False
+    elif schedule.frequency == 'daily':
+        schedule.start_time += timezone.timedelta(days=1)
+    elif schedule.frequency == 'weekly':
+        schedule.start_time += timezone.timedelta(weeks=1)
+    elif schedule.frequency == 'monthly':
+        schedule.start_time += relativedelta(months=1)
+
+
+def claim_due_schedules(now, limit):
+    """
+    Queue the newsletters of up to limit due schedules and move them to their next run, in one transaction.
+    Schedules locked by another scheduler run are skipped. Returns how many were claimed.
+    """
+    with transaction.atomic():
+        schedules = list(
+            NewsletterSchedule.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("draft__newsletter_template__user")
+            .filter(is_active=True, start_time__lte=now)
+            .order_by("start_time")[:limit]
+        )
+        if not schedules:
+            return 0
+
+        emails = []
+        for schedule in schedules:
+            draft = schedule.draft
+            user = draft.newsletter_template.user
+
+            # The outbox workers send it and log the outcome
+            emails.append({
+                "user_id": user.pk,
+                "recipient": user.email,
+                "subject": draft.newsletter_template.name,
+                "html_content": draft.html_content,
+            })
+
+            next_run(schedule)
+            schedule.updated = now
+
+        enqueue_emails(emails)
+        NewsletterSchedule.objects.bulk_update(schedules, ['start_time', 'is_active', 'updated'])
+
+    logger.info(f"Queued the newsletters of {len(schedules)} schedules")
+    return len(schedules)
+
+
 def send_scheduled_newsletters():
     now = timezone.now()
     logger.info(f"Running scheduled newsletter job at {now}")
 
-    # Fetch all active schedules due now or earlier
-    active_schedules = NewsletterSchedule.objects.filter(
-        is_active=True,
-        start_time__lte=now
-    )
-
-    for schedule in active_schedules:
-        draft = schedule.draft
-        user = draft.newsletter_template.user
-
-        print(user.email)
-        try:
-            # Here you can integrate your email sending logic
-            # e.g. resend.Emails.send(...)
-            print(f"Sent newsletter to {user.email}")
-
-            # Log success
-            EmailLog.objects.create(
-                user_id=user.pk,
-                recipient=user.email,
-                message=draft.html_content,
-                status='SUCCESS'
-            )
-        except Exception as e:
-            # Log failure
-            EmailLog.objects.create(
-                user_id=user.pk,
-                recipient=user.email,
-                message=draft.html_content,
-                status='FAILED',
-                error_message=str(e)
-            )
-            logger.error(f"Failed to send newsletter to {user.email}: {e}")
-
-        # Update next run based on frequency
-        if schedule.frequency == 'once':
-            schedule.is_active = False
-        elif schedule.frequency == 'daily':
-            schedule.start_time += timezone.timedelta(days=1)
-        elif schedule.frequency == 'weekly':
-            schedule.start_time += timezone.timedelta(weeks=1)
-        elif schedule.frequency == 'monthly':
-            schedule.start_time += relativedelta(months=1)
-
-        schedule.save()
-        logger.info(f"Updated schedule {schedule.id} for next run: {schedule.start_time}")
+    # Claim the schedules due now or earlier batch by batch
+    batch_size = settings.NEWSLETTER_SCHEDULES['BATCH_SIZE']
+    try:
+        while claim_due_schedules(now, batch_size) == batch_size:
+            pass
+    except Exception as e:
+        logger.error(f"Failed to queue scheduled newsletters: {e}")
 
 
 def start_scheduler():
@@ -1,22 +1,23 @@
+import asyncio
 import logging
-import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-import resend
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from django.db import transaction
+from django.conf import settings
+from django.db import close_old_connections
 from dotenv import load_dotenv
 
-from app.global_constants import RoleConstants, SourceTypeConstants, TopicConstants
+from app.global_constants import RoleConstants
 from app.mail.models import EmailLog
+from app.mail.outbox import enqueue_emails
 from app.newsletter.ai_curator import curate_newsletter
-from app.newsletter.email_sender import newsletter_to_html
-from app.scrape.scrape_utils import scrape_api_source, scrape_rss_source, scrape_reddit_source, scrape_arxiv_source, \
-    get_trends_to_watch
-from app.source.models import Source
-from app.topic.models import UserTopic
+from app.newsletter.email_sender import render_newsletters
+from app.newsletter.llm_client import LLMPoolBusyError
+from app.newsletter.newsletter_utils import group_users_by_profile
+from app.scrape.scrape_cache import get_topic_articles, get_topic_trends, warm_topic_cache
 from app.user.models import User
 from app.user.serializers import UserDisplaySerializer
 
@@ -27,108 +28,98 @@ def send_daily_email():
     """Function that sends email and logs results."""
 
     subject = "Daily Newsletter"
-    retries = 3
+    recipient = "abhiroop1998.dev@gmail.com"
 
     user_queryset = User.objects.filter(role_id=RoleConstants.USER.value, is_active=True)
 
     user_list = UserDisplaySerializer(user_queryset, many=True).data
-
-    for user in user_list:
-        user_topic_queryset = UserTopic.objects.select_related("topic") \
-            .filter(user_id=user.get("pk"))
-
-        user_topic_list = [
-            {"topic_id": ut.topic.id, "topic_name": ut.topic.name}
-            for ut in user_topic_queryset
-        ]
-
-        topics = []
-        articles = []
-        top_trends = []
-
-        for item in user_topic_list:
-
-            topics.append(item['topic_name'])
-
-            # fetch urls and source_type
-            url_source_type = list(
-                Source.objects.filter(topic_id=item["topic_id"], is_active=True).values_list("url", "source_type"))
-
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-
-            # scrape the news
-            for url, source_type in url_source_type:
-
-                if source_type == SourceTypeConstants.API.value:
-                    articles.extend(scrape_api_source(url, headers))
-                elif source_type == SourceTypeConstants.REDDIT.value:
-                    articles.extend(scrape_reddit_source(url, headers))
-                elif source_type == SourceTypeConstants.ARXIV.value:
-                    articles.extend(scrape_arxiv_source(url, headers))
-                elif source_type == SourceTypeConstants.RSS.value:
-                    articles.extend(scrape_rss_source(url))
-
-            # scrape the top trends
-            if item["topic_id"] == TopicConstants.AI.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/7509269760615483402"
-
-            elif item["topic_id"] == TopicConstants.BLOCKCHAIN.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/6397280906166700581"
-
-            elif item["topic_id"] == TopicConstants.CYBERSECURITY.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/1739904053101697444"
-
-            elif item["topic_id"] == TopicConstants.IOT.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/5112460639121574802"
-
-            top_trends.extend(get_trends_to_watch(RSS_URL))
-
-        newsletter_content = curate_newsletter(articles, topics, top_trends, user_id=user.get("pk"))
-
-        html_content = newsletter_to_html(newsletter_content)
-
-        for attempt in range(1, retries + 1):
+    user_ids = [user.get("pk") for user in user_list]
+
+    # users with the same topics and style samples get the same newsletter, curate it once per group
+    user_groups = group_users_by_profile(user_ids)
+    logger.info(f"[{datetime.now()}] Curating {len(user_groups)} newsletters for {len(user_ids)} users "
+                f"(grouping ratio {len(user_ids) / max(len(user_groups), 1):.2f} users per LLM call)")
+
+    # scrape every topic once for the run, each group's curation reads from the scrape cache
+    topic_ids = set(topic_id for group in user_groups for topic_id in group["topic_ids"])
+    scrape_window = warm_topic_cache(topic_ids)
+
+    # curate the groups in parallel, the shared LLM client pool keeps the calls within the provider limits
+    results = asyncio.run(curate_groups(user_groups, scrape_window))
+
+    curated, failed = [], []
+    for group, result in zip(user_groups, results):
+        if isinstance(result, Exception):
+            logger.error(f"[{datetime.now()}] Curation failed for users {group['user_ids']}: {str(result)}")
+            failed.append((group, result))
+        else:
+            curated.append((group, result))
+
+    # render every curated newsletter in one batch
+    html_contents = render_newsletters([content for _, content in curated])
+
+    # the outbox workers send them, the scheduler thread does not wait on the provider
+    enqueue_emails([
+        {"user_id": user_id, "recipient": recipient, "subject": subject, "html_content": html_content}
+        for (group, _), html_content in zip(curated, html_contents)
+        for user_id in group["user_ids"]
+    ])
+
+    # members of the groups that could not be curated are logged as failed, not silently skipped
+    EmailLog.objects.bulk_create([
+        EmailLog(user_id=user_id, recipient=recipient, status='FAILED', error_message=f"Curation failed: {str(error)}")
+        for group, error in failed
+        for user_id in group["user_ids"]
+    ])
+    logger.info(f"[{datetime.now()}] Queued the newsletters of {len(curated)} groups, {len(failed)} groups failed")
+
+
+def curate_group(group, scrape_window):
+    """
+    Curate the newsletter of a user group. The batch can wait on the LLM pool for BATCH_QUEUE_TIMEOUT
+    instead of the interactive QUEUE_TIMEOUT, and retries when the pool is busy.
+    """
+    config = settings.LLM_CLIENT
+
+    try:
+        topics = group["topics"]
+        topic_ids = group["topic_ids"]
+
+        # read the news and the top trends scraped for the topics at the start of the run
+        articles = get_topic_articles(topic_ids, scrape_window)
+        top_trends = get_topic_trends(topic_ids, scrape_window)
+
+        for attempt in range(config['BATCH_RETRIES'] + 1):
             try:
-                resend.api_key = os.getenv("RESEND_API_KEY")
-                r = resend.Emails.send({
-                    "from": "onboarding@resend.dev",
-                    "to": "abhiroop1998.dev@gmail.com",
-                    "subject": subject,
-                    "html": html_content
-                })
-
-
-                # Create DB log
-                with transaction.atomic():
-                    EmailLog.objects.create(
-                        user_id=user.get("pk"),
-                        recipient="abhiroop1998.dev@gmail.com",
-                        message=html_content,
-                        status='SUCCESS'
-                    )
-
-                logger.info(f"[{datetime.now()}] Email sent successfully to abhiroop1998.dev@gmail.com")
-                return
-
-            except Exception as e:
-                logger.error(f"Attempt {attempt} failed: {str(e)}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-
-        # If all retries failed
-        EmailLog.objects.create(
-            user_id=user.get("pk"),
-            message=html_content,
-            recipient="abhiroop1998.dev@gmail.com",
-            status='FAILED',
-            error_message=str(e)
+                # members share their style samples, the first one stands for the group
+                return curate_newsletter(
+                    articles, topics, top_trends, user_id=group["user_ids"][0],
+                    queue_timeout=config['BATCH_QUEUE_TIMEOUT']
+                )
+            except LLMPoolBusyError as e:
+                if attempt == config['BATCH_RETRIES']:
+                    raise
+                logger.warning(f"[{datetime.now()}] LLM pool busy for users {group['user_ids']}, retrying: {str(e)}")
+                time.sleep(config['BATCH_RETRY_DELAY'] * 2 ** attempt)
+
+    finally:
+        # runs on a worker thread, its connection would otherwise stay open
+        close_old_connections()
+
+
+async def curate_groups(user_groups, scrape_window):
+    """
+    Curate the groups on at most MAX_CONCURRENCY worker threads, as many as the LLM pool can serve at once.
+    Returns the newsletter JSON of each group in order, or the exception its curation failed with.
+    """
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=settings.LLM_CLIENT['MAX_CONCURRENCY'], thread_name_prefix="curate") as executor:
+        return await asyncio.gather(
+            *[loop.run_in_executor(executor, curate_group, group, scrape_window) for group in user_groups],
+            return_exceptions=True
         )
-        logger.error(f"[{datetime.now()}] Email sending failed after retries.")
+
 
 def start_scheduler():
     scheduler = BackgroundScheduler()
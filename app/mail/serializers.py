@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from app.mail.models import EmailLog
+from app.mail.models import EmailLog, OutboundEmail
 from app.user.models import User
 
 
@@ -11,19 +11,40 @@ class UserNameDisplaySerializer(serializers.ModelSerializer):
 
 
 class EmailLogListFilterSerializer(serializers.ModelSerializer):
+    """Metadata only, the HTML is fetched from the detail endpoint. size is annotated by the list view"""
     user = UserNameDisplaySerializer()
+    size = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = EmailLog
-        fields = ('user', 'recipient', 'message', 'status', 'error_message')
+        fields = ('pk', 'user', 'recipient', 'status', 'error_message', 'created', 'size')
 
 class UserEmailListFilterSerializer(serializers.ModelSerializer):
+    """Metadata only, the HTML is fetched from the detail endpoint. size is annotated by the list view"""
+    size = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = EmailLog
-        fields = ('recipient', 'message', 'status', 'error_message', 'created')
+        fields = ('pk', 'recipient', 'status', 'error_message', 'created', 'size')
+
+class EmailLogDetailSerializer(serializers.ModelSerializer):
+    user = UserNameDisplaySerializer()
+    message = serializers.CharField(source='html', read_only=True)
+
+    class Meta:
+        model = EmailLog
+        fields = ('pk', 'user', 'recipient', 'message', 'status', 'error_message', 'created')
 
 class EmailDisplaySerializer(serializers.ModelSerializer):
+    message = serializers.CharField(source='html', read_only=True)
+
     class Meta:
         model = EmailLog
-        fields = ('recipient', 'message')
\ No newline at end of file
+        fields = ('recipient', 'message')
+
+
+class OutboundEmailDisplaySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OutboundEmail
+        fields = ('pk', 'recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'error_message',
+                  'created')
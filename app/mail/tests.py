@@ -1,3 +1,191 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app.mail import outbox
+from app.mail.models import EmailLog, OutboundEmail
+from app.role.models import Role
+from app.user.models import User
+
+OUTBOX_SETTINGS = {
+    'WORKERS': 1,
+    'BATCH_SIZE': 100,
+    'PROVIDER_BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_SECONDS': 10,
+    'POLL_INTERVAL': 5,
+    'CLAIM_TIMEOUT': 300,
+    'FROM_EMAIL': 'newsletter@example.com',
+}
+
+
+@override_settings(EMAIL_OUTBOX=OUTBOX_SETTINGS)
+class OutboxTestCase(TestCase):
+
+    def setUp(self):
+        role = Role.objects.create(pk=2, name='User')
+        self.user = User.objects.create_user('reader@example.com', 'password', role_id=role.pk, first_name='Ada',
+                                             last_name='Reader')
+
+    def enqueue(self, count, html="<p>Newsletter</p>"):
+        return outbox.enqueue_emails([
+            {
+                "user_id": self.user.pk,
+                "recipient": f"reader{index}@example.com",
+                "subject": "Your newsletter",
+                "html_content": html,
+            }
+            for index in range(count)
+        ])
+
+
+class EnqueueAndClaimTests(OutboxTestCase):
+
+    def test_recipients_of_a_newsletter_share_its_body(self):
+        emails = self.enqueue(3) + self.enqueue(1, html="<p>Other</p>")
+
+        self.assertEqual(len({email.body_id for email in emails}), 2)
+        self.assertEqual(OutboundEmail.objects.get(pk=emails[0].pk).body.html, "<p>Newsletter</p>")
+        self.assertTrue(all(email.status == 'PENDING' and email.max_attempts == 3 for email in emails))
+
+    def test_claim_takes_due_emails_up_to_the_limit(self):
+        emails = self.enqueue(5)
+        OutboundEmail.objects.filter(pk=emails[4].pk).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        claimed = outbox.claim_due_emails(3)
+
+        self.assertEqual([email.pk for email in claimed], [email.pk for email in emails[:3]])
+        self.assertEqual(OutboundEmail.objects.filter(status='SENDING', attempts=1).count(), 3)
+        # The claimed emails are locked until the claim times out, the future one is not due yet
+        self.assertEqual([email.pk for email in outbox.claim_due_emails(10)], [emails[3].pk])
+
+    def test_claim_times_out(self):
+        self.enqueue(1)
+        outbox.claim_due_emails(10)
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        claimed = outbox.claim_due_emails(10)
+
+        self.assertEqual(claimed[0].attempts, 2)
+
+    def test_retry_delay_doubles(self):
+        self.assertEqual([outbox.retry_delay(attempts) for attempts in (1, 2, 3)], [10, 20, 40])
+
+    def test_failed_emails_are_retried_with_backoff(self):
+        self.enqueue(2)
+        emails = outbox.claim_due_emails(10)
+
+        with self.assertLogs('scheduler', 'ERROR'):
+            outbox.mark_failed(emails, ["timeout"] * 2)
+
+        for email in OutboundEmail.objects.all():
+            self.assertEqual(email.status, 'PENDING')
+            self.assertEqual(email.error_message, "timeout")
+            self.assertAlmostEqual(
+                (email.next_attempt_at - timezone.now()).total_seconds(), outbox.retry_delay(1), delta=5
+            )
+        self.assertFalse(EmailLog.objects.exists())
+
+    def test_emails_out_of_attempts_are_given_up(self):
+        self.enqueue(2)
+        emails = outbox.claim_due_emails(10)
+        emails[0].attempts = emails[0].max_attempts
+
+        with self.assertLogs('scheduler', 'ERROR'):
+            outbox.mark_failed(emails, ["bounced", "timeout"])
+
+        self.assertEqual(OutboundEmail.objects.get(pk=emails[0].pk).status, 'FAILED')
+        self.assertEqual(OutboundEmail.objects.get(pk=emails[1].pk).status, 'PENDING')
+        self.assertEqual(list(EmailLog.objects.values_list('recipient', 'status', 'error_message')),
+                         [(emails[0].recipient, 'FAILED', "bounced")])
+
+    def test_failures_without_retry_are_given_up(self):
+        self.enqueue(1)
+
+        with self.assertLogs('scheduler', 'ERROR'):
+            outbox.mark_failed(outbox.claim_due_emails(10), ["rejected"], retry=False)
+
+        self.assertEqual(OutboundEmail.objects.get().status, 'FAILED')
+        self.assertEqual(EmailLog.objects.get().status, 'FAILED')
+
+
+def accept_all(params, options):
+    return {"data": [{"id": f"msg-{index}"} for index in range(len(params))]}
+
+
+class SendBatchTests(OutboxTestCase):
+
+    def send(self, side_effect, limit=10):
+        """Claim and deliver the due emails with resend.Batch.send replaced, returns the mock"""
+        with mock.patch.object(outbox.resend.Batch, 'send', side_effect=side_effect) as send:
+            outbox.deliver_emails(outbox.claim_due_emails(limit))
+        return send
+
+    def test_accepted_emails_are_sent_and_logged(self):
+        self.enqueue(2)
+
+        send = self.send(accept_all)
+
+        params, options = send.call_args.args
+        self.assertEqual([param["to"] for param in params], ["reader0@example.com", "reader1@example.com"])
+        self.assertEqual(params[0]["html"], "<p>Newsletter</p>")
+        self.assertEqual(params[0]["from"], "newsletter@example.com")
+        self.assertEqual(options["batch_validation"], "permissive")
+        self.assertEqual(list(OutboundEmail.objects.order_by('pk').values_list('status', 'provider_message_id')),
+                         [('SENT', 'msg-0'), ('SENT', 'msg-1')])
+        self.assertEqual(EmailLog.objects.filter(status='SUCCESS').count(), 2)
+
+    def test_rejected_emails_fail_for_good_without_holding_back_the_rest(self):
+        emails = self.enqueue(3)
+
+        with self.assertLogs('scheduler', 'ERROR'):
+            self.send(lambda params, options: {
+                "data": [{"id": "msg-0"}, {"id": "msg-2"}],
+                "errors": [{"index": 1, "message": "Invalid recipient"}],
+            })
+
+        self.assertEqual(OutboundEmail.objects.get(pk=emails[0].pk).provider_message_id, "msg-0")
+        self.assertEqual(OutboundEmail.objects.get(pk=emails[2].pk).provider_message_id, "msg-2")
+        rejected = OutboundEmail.objects.get(pk=emails[1].pk)
+        self.assertEqual((rejected.status, rejected.error_message), ('FAILED', "Invalid recipient"))
+        self.assertEqual(EmailLog.objects.get(status='FAILED').recipient, rejected.recipient)
+
+    def test_failed_request_is_retried_under_the_same_key(self):
+        self.enqueue(2)
+
+        with self.assertLogs('scheduler', 'ERROR'):
+            first = self.send(TimeoutError("read timed out"))
+
+        key = first.call_args.args[1]["idempotency_key"]
+        self.assertTrue(key)
+        self.assertEqual(set(OutboundEmail.objects.values_list('status', 'batch_key')), {('PENDING', key)})
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        retry = self.send(accept_all)
+
+        params, options = retry.call_args.args
+        self.assertEqual(options["idempotency_key"], key)
+        self.assertEqual(len(params), 2)
+        self.assertEqual(set(OutboundEmail.objects.values_list('status', flat=True)), {'SENT'})
+
+    def test_retried_batch_is_claimed_whole_past_the_limit(self):
+        self.enqueue(3)
+        with self.assertLogs('scheduler', 'ERROR'):
+            self.send(TimeoutError("read timed out"))
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+
+        self.assertEqual(len(outbox.claim_due_emails(1)), 3)
+
+    @override_settings(EMAIL_OUTBOX={**OUTBOX_SETTINGS, 'PROVIDER_BATCH_SIZE': 2})
+    def test_new_emails_are_cut_into_provider_batches(self):
+        self.enqueue(5)
+
+        send = self.send(accept_all)
+
+        self.assertEqual([len(call.args[0]) for call in send.call_args_list], [2, 2, 1])
+        keys = [call.args[1]["idempotency_key"] for call in send.call_args_list]
+        self.assertEqual(len(set(keys)), 3)
+        stored_keys = OutboundEmail.objects.order_by('pk').values_list('batch_key', flat=True)
+        self.assertEqual(list(stored_keys), [keys[0], keys[0], keys[1], keys[1], keys[2]])
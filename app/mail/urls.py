@@ -1,13 +1,16 @@
 from django.urls import path
 
 from app.mail.views import EmailLogListFilterAPIView, UserEmailListFilterAPIView, CountNewsletterReceivedAPIView, \
-    LatestNewsletterAPIView
+    LatestNewsletterAPIView, OutboundEmailDetailAPIView, EmailLogDetailAPIView, UserEmailDetailAPIView
 
 urlpatterns = [
     # Authentication
     path('list-filter', EmailLogListFilterAPIView.as_view(), name="email-log-list-filter"),
     path('user-list-filter', UserEmailListFilterAPIView.as_view(), name="user-list-filter"),
+    path('<int:pk>', EmailLogDetailAPIView.as_view(), name="email-log-detail"),
+    path('user/<int:pk>', UserEmailDetailAPIView.as_view(), name="user-email-detail"),
 
     path('count-newsletter-received', CountNewsletterReceivedAPIView.as_view(), name="count-newsletter-received"),
     path('latest-newsletter', LatestNewsletterAPIView.as_view(), name="latest-newsletter"),
+    path('outbox/<int:pk>', OutboundEmailDetailAPIView.as_view(), name="outbound-email-detail"),
     ]
\ No newline at end of file
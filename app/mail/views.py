@@ -1,3 +1,5 @@
+from django.db.models import IntegerField
+from django.db.models.functions import Coalesce, Length
 from django.shortcuts import render
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
@@ -6,13 +8,24 @@ from rest_framework.generics import ListAPIView, GenericAPIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from app.core.views import CustomPageNumberPagination
-from app.global_constants import SuccessMessage
-from app.mail.models import EmailLog
-from app.mail.serializers import EmailLogListFilterSerializer, UserEmailListFilterSerializer, EmailDisplaySerializer
+from app.global_constants import SuccessMessage, ErrorMessage
+from app.mail.models import EmailLog, OutboundEmail
+from app.mail.serializers import EmailLogListFilterSerializer, UserEmailListFilterSerializer, EmailDisplaySerializer, \
+    OutboundEmailDisplaySerializer, EmailLogDetailSerializer
 from app.utils import get_response_schema
 from permissions import IsSuperAdmin, IsUser
 
 
+def email_log_list_queryset():
+    """
+    Email logs without their HTML, the list endpoints only return its size in bytes
+    (in characters for rows logged before EmailBody, whose HTML is still in message)
+    """
+    return EmailLog.objects.select_related("user").defer("message").annotate(
+        size=Coalesce("body__size", Length("message"), output_field=IntegerField())
+    )
+
+
 # Create your views here.
 class EmailLogListFilterAPIView(ListAPIView):
     """List all email logs"""
@@ -25,7 +38,7 @@ class EmailLogListFilterAPIView(ListAPIView):
 
     def get_queryset(self):
 
-        email_queryset = EmailLog.objects.select_related("user").filter(is_active=True).order_by("-created")
+        email_queryset = email_log_list_queryset().filter(is_active=True).order_by("-created")
 
         # Filter by user first name
         first_name = self.request.query_params.get("first_name", None)
@@ -93,7 +106,7 @@ class UserEmailListFilterAPIView(ListAPIView):
 
     def get_queryset(self):
 
-        email_queryset = EmailLog.objects.select_related("user").filter(user_id=self.request.user.id, is_active=True).order_by("-created")
+        email_queryset = email_log_list_queryset().filter(user_id=self.request.user.id, is_active=True).order_by("-created")
 
         # Filter by user email
         email = self.request.query_params.get("email", None)
@@ -128,6 +141,42 @@ class UserEmailListFilterAPIView(ListAPIView):
         return self.list(request, *args, **kwargs)
 
 
+class EmailLogDetailAPIView(GenericAPIView):
+    """Email log with its HTML"""
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request, pk):
+
+        email_log = EmailLog.objects.select_related("user", "body").filter(pk=pk, is_active=True).first()
+        if not email_log:
+            return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+        serializer = EmailLogDetailSerializer(email_log)
+
+        return get_response_schema(serializer.data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+
+
+class UserEmailDetailAPIView(GenericAPIView):
+    """Email of the user with its HTML"""
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsUser]
+
+    def get(self, request, pk):
+
+        email_log = EmailLog.objects.select_related("user", "body").filter(
+            pk=pk, user_id=request.user.id, is_active=True
+        ).first()
+        if not email_log:
+            return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+        serializer = EmailLogDetailSerializer(email_log)
+
+        return get_response_schema(serializer.data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+
+
 class CountNewsletterReceivedAPIView(GenericAPIView):
     """Count all newsletter received"""
 
@@ -149,8 +198,25 @@ class LatestNewsletterAPIView(GenericAPIView):
 
     def get(self, request):
 
-        latest_email = EmailLog.objects.filter(user_id=request.user.id, is_active=True, status="SUCCESS").order_by("-id").first()
+        latest_email = EmailLog.objects.select_related("body").filter(user_id=request.user.id, is_active=True, status="SUCCESS").order_by("-id").first()
 
         serializer = EmailDisplaySerializer(latest_email)
 
         return get_response_schema(serializer.data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+
+
+class OutboundEmailDetailAPIView(GenericAPIView):
+    """Delivery status of an email queued in the outbox"""
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsUser]
+
+    def get(self, request, pk):
+
+        outbound_email = OutboundEmail.objects.filter(pk=pk, user_id=request.user.id, is_active=True).first()
+        if not outbound_email:
+            return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+        serializer = OutboundEmailDisplaySerializer(outbound_email)
+
+        return get_response_schema(serializer.data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
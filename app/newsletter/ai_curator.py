@@ -1,14 +1,20 @@
-import json
+import time
 from typing import List
 
+from django.conf import settings
 from dotenv import load_dotenv
-from groq import Groq
-import os
 
+from app.newsletter.llm_cache import get_cached_newsletter, cache_newsletter
+from app.newsletter.relevance_ranker import RelevanceRanker, default_topic_quota
+from app.newsletter.llm_client import get_llm_pool
+from app.newsletter.llm_json import parse_newsletter_json, IncrementalNewsletterParser
+from app.newsletter.token_budget import PromptBudgetPlanner, record_llm_call, estimate_call_tokens
 from app.sample.sample_utils import style_examples_loader
 
 load_dotenv()
 
+CURATION_MODEL = "openai/gpt-oss-20b"
+
 
 # def curate_newsletter(articles: list, user_topics: list):
 #     """Use Groq LLM to curate and summarize articles"""
@@ -100,45 +106,48 @@ def summarize_text(text: str, max_words: int = 40) -> str:
     words = text.split()
     return " ".join(words[:max_words]) + ("..." if len(words) > max_words else "")
 
-def curate_newsletter(
-    articles: List[dict],
-    user_topics: List[str],
-    top_trends: List[dict],
-    max_articles: int = 3,
-    max_trends: int = 3,
-    user_id: int = None
-) -> dict:
-    """Curate a newsletter as structured JSON using Groq LLM, token-safe version"""
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-    # Load writing style examples
-    style_examples = style_examples_loader(user_id)
+def rank_articles(articles: List[dict], user_topics: List[str], max_articles: int = None,
+                  per_topic_quota: int = None) -> List[dict]:
+    """
+    Keep the articles most relevant to user_topics (BM25), each topic gets an even share of the slots by default.
+    Up to LLM_BUDGET['MAX_ARTICLES'] candidates by default, the prompt takes as many as its budget allows.
+    """
+    if max_articles is None:
+        max_articles = settings.LLM_BUDGET['MAX_ARTICLES']
+    if per_topic_quota is None:
+        per_topic_quota = default_topic_quota(max_articles, user_topics)
+
+    return RelevanceRanker(articles, user_topics).rank(max_articles, per_topic_quota)
+
+
+# Articles packed ahead of the trends, the other candidates share what is left of the budget
+LEADING_ARTICLES = 3
+
+# Summary lengths in words tried for each article and trend, longest first
+ARTICLE_SUMMARY_WORDS = (80, 40, 20)
+TREND_SUMMARY_WORDS = (30, 15)
+
+
+def format_style_prompt(style_examples: List[str]) -> str:
     style_prompt = "\n\n".join([
         f"=== EXAMPLE STYLE {i + 1} ===\n{ex}\n"
         for i, ex in enumerate(style_examples)
     ])
     style_prompt += "\n===\nWrite the following newsletter in a similar voice and tone.\n"
+    return style_prompt
 
-    # Sort or filter articles by relevance to user_topics (simple keyword match)
-    def relevance_score(article):
-        content = article.get("content", "") + " " + article.get("title", "")
-        return sum(content.lower().count(topic.lower()) for topic in user_topics)
 
-    top_articles = sorted(articles, key=relevance_score, reverse=True)[:max_articles]
+def format_article(a: dict, max_words: int) -> str:
+    return f"Title: {a.get('title','')}\nSummary: {summarize_text(a.get('content',''), max_words)}\nSource: {a.get('source','')}\nLink: {a.get('link','')}"
 
-    # Prepare article context
-    articles_context = "\n\n".join([
-        f"Title: {a.get('title','')}\nSummary: {summarize_text(a.get('content',''))}\nSource: {a.get('source','')}\nLink: {a.get('link','')}"
-        for a in top_articles
-    ])
 
-    # Prepare trends context
-    trends_context = "\n\n".join([
-        f"Title: {t.get('title','')}\nSummary: {summarize_text(t.get('summary',''), max_words=30)}\nLink: {t.get('link','')}"
-        for t in top_trends[:max_trends]
-    ])
+def format_trend(t: dict, max_words: int) -> str:
+    return f"Title: {t.get('title','')}\nSummary: {summarize_text(t.get('summary',''), max_words=max_words)}\nLink: {t.get('link','')}"
+
 
-    prompt = f"""
+def render_newsletter_prompt(style_prompt: str, user_topics: List[str], articles_context: str, trends_context: str) -> str:
+    return f"""
 {style_prompt}
 You are an AI newsletter curator. Based on the following user topics: {', '.join(user_topics)}, create a newsletter as **valid JSON** with these sections:
 
@@ -182,17 +191,170 @@ All Trends:
 {trends_context}
 """
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
+
+def build_newsletter_prompt(
+    top_articles: List[dict],
+    user_topics: List[str],
+    top_trends: List[dict],
+    max_trends: int = 3,
+    user_id: int = None
+) -> str:
+    """
+    Build the curation prompt from the ranked articles, the trends and the user's writing style,
+    packed into the prompt token budget: the instructions and the first style example always go in,
+    then the LEADING_ARTICLES most relevant articles, the trends and the other style examples, each with the
+    longest summary that still fits. The remaining articles follow in relevance order until the budget runs out.
+    """
+    planner = PromptBudgetPlanner()
+
+    # Load writing style examples
+    style_examples = style_examples_loader(user_id)
+    planner.reserve(render_newsletter_prompt(format_style_prompt(style_examples[:1]), user_topics, "", ""))
+
+    # Prepare article context
+    articles_context = [
+        planner.fit(lambda max_words: format_article(a, max_words), ARTICLE_SUMMARY_WORDS)
+        for a in top_articles[:LEADING_ARTICLES]
+    ]
+
+    # Prepare trends context
+    trends_context = [
+        planner.fit(lambda max_words: format_trend(t, max_words), TREND_SUMMARY_WORDS)
+        for t in top_trends[:max_trends]
+    ]
+
+    # Further style examples with what is left
+    style_examples = style_examples[:1] + [
+        ex for ex in style_examples[1:]
+        if planner.fit(lambda _: ex, [None])
+    ]
+
+    # Further articles in relevance order while the budget lasts
+    for a in top_articles[LEADING_ARTICLES:]:
+        text = planner.fit(lambda max_words: format_article(a, max_words), ARTICLE_SUMMARY_WORDS)
+        if text is None:
+            break
+        articles_context.append(text)
+
+    return render_newsletter_prompt(
+        format_style_prompt(style_examples),
+        user_topics,
+        "\n\n".join(text for text in articles_context if text),
+        "\n\n".join(text for text in trends_context if text),
+    )
+
+
+def parse_newsletter_content(content: str) -> dict:
+    """Parse the LLM output as newsletter JSON, recovering the intact sections of malformed or truncated output"""
+    newsletter_json = parse_newsletter_json(content)
+
+    if not newsletter_json:
+        # fallback if no section could be recovered
+        newsletter_json = {"raw_text": content.strip()}
+
+    return newsletter_json
+
+
+def curate_newsletter(
+    articles: List[dict],
+    user_topics: List[str],
+    top_trends: List[dict],
+    max_articles: int = None,
+    max_trends: int = 3,
+    user_id: int = None,
+    queue_timeout: float = None
+) -> dict:
+    """
+    Curate a newsletter as structured JSON using Groq LLM, token-safe version.
+    queue_timeout is how long to wait for the LLM pool, its interactive QUEUE_TIMEOUT by default.
+    """
+    top_articles = rank_articles(articles, user_topics, max_articles)
+    prompt = build_newsletter_prompt(top_articles, user_topics, top_trends, max_trends, user_id)
+
+    # Same articles, topics and style as a recent call, skip the LLM round-trip
+    newsletter_json = get_cached_newsletter(CURATION_MODEL, prompt)
+    if newsletter_json is not None:
+        return newsletter_json
+
+    started = time.perf_counter()
+    response = get_llm_pool().chat_completion(
+        estimate_call_tokens(prompt),
+        queue_timeout=queue_timeout,
+        model=CURATION_MODEL,
         messages=[{"role": "user", "content": prompt}],
     )
+    record_llm_call(user_id, CURATION_MODEL, prompt, response.usage, int((time.perf_counter() - started) * 1000))
+
+    newsletter_json = parse_newsletter_content(response.choices[0].message.content)
+    cache_newsletter(CURATION_MODEL, prompt, newsletter_json)
+
+    return newsletter_json
+
+
+def stream_curate_newsletter(
+    top_articles: List[dict],
+    user_topics: List[str],
+    top_trends: List[dict],
+    max_trends: int = 3,
+    user_id: int = None
+):
+    """
+    Curate already ranked articles like curate_newsletter, streaming the completion.
+    Yields ("token", text) for every chunk as it arrives, ("section", (name, value)) as soon as a section
+    of the newsletter JSON is complete and finally ("result", newsletter_json).
+    """
+    prompt = build_newsletter_prompt(top_articles, user_topics, top_trends, max_trends, user_id)
+
+    newsletter_json = get_cached_newsletter(CURATION_MODEL, prompt)
+    if newsletter_json is not None:
+        for section in newsletter_json.items():
+            yield "section", section
+        yield "result", newsletter_json
+        return
+
+    started = time.perf_counter()
+
+    # The pool slot is held until the stream is consumed
+    pool = get_llm_pool()
+    estimated_tokens = estimate_call_tokens(prompt)
+    with pool.lease(estimated_tokens) as slot:
+        stream = slot.client.chat.completions.create(
+            model=CURATION_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+        )
+
+        content_parts = []
+        parser = IncrementalNewsletterParser()
+        usage = None
+        for chunk in stream:
+            # Groq reports the usage of a streamed completion on its last chunk
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                usage = x_groq.usage
+
+            if not chunk.choices:
+                continue
+
+            delta = chunk.choices[0].delta.content
+            if delta:
+                content_parts.append(delta)
+                yield "token", delta
+
+                for section in parser.feed(delta):
+                    yield "section", section
+
+        pool.settle(slot, estimated_tokens, usage)
+
+    record_llm_call(user_id, CURATION_MODEL, prompt, usage, int((time.perf_counter() - started) * 1000))
 
-    content = response.choices[0].message.content.strip()
+    # A list section cut off by the end of the output keeps its complete items
+    newsletter_json, salvaged = parser.finish()
+    for section in salvaged:
+        yield "section", section
 
-    try:
-        newsletter_json = json.loads(content)
-    except json.JSONDecodeError:
-        # fallback if JSON fails
-        newsletter_json = {"raw_text": content}
+    if not newsletter_json:
+        newsletter_json = parse_newsletter_content("".join(content_parts))
+    cache_newsletter(CURATION_MODEL, prompt, newsletter_json)
 
-    return newsletter_json
\ No newline at end of file
+    yield "result", newsletter_json
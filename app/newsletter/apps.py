@@ -1,6 +1,18 @@
+import os
+import threading
+
 from django.apps import AppConfig
 
 
 class NewsletterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.newsletter'
+
+    def ready(self):
+        # Avoid running twice due to Django auto-reloader
+        if os.environ.get("RUN_MAIN") != "true":
+            return
+
+        # Jobs of the previous process only lived in its pool, off the startup path as it queries the database
+        from app.newsletter.job_runner import recover_generation_jobs
+        threading.Thread(target=recover_generation_jobs, daemon=True).start()
@@ -1,3 +1,10 @@
+import datetime
+from functools import lru_cache
+
+from django.conf import settings
+
+from app.newsletter.html_template import get_compiled_template
+
 # def newsletter_to_html(newsletter_text: str, logo_url: str = None) -> str:
 #     """Convert LLM newsletter output to a warm, newsletter-style HTML"""
 #     import re
@@ -204,136 +211,113 @@
 #
 #     return html_content
 
-def newsletter_to_html(newsletter_json: dict, logo_url: str = None, newsletter_title: str = "Your Weekly Digest") -> str:
-    """Convert curated newsletter JSON to modern, single-column newsletter HTML"""
-    import datetime
-
-    intro = newsletter_json.get("intro", "")
-    curated_links = newsletter_json.get("curated_links", [])
-    summaries = newsletter_json.get("summaries", [])
-    commentary = newsletter_json.get("commentary", "")
-    trends = newsletter_json.get("trends", [])
-
-    today_str = datetime.datetime.now().strftime("%B %d, %Y")
-
-    # Curated links HTML
-    curated_html = ""
-    for link in curated_links:
-        curated_html += f"""
+CURATED_LINK_TEMPLATE = """
         <div style="background-color:#ffffff; padding:15px; margin-bottom:15px; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">
-            <h3 style="margin:0; color:#d84315; font-family: Georgia, serif;">{link.get('title','')}</h3>
-            <p style="margin:5px 0 10px 0; color:#555555; font-family: Georgia, serif;">{link.get('summary','')} ({link.get('source','')})</p>
-            <a href="{link.get('link','#')}" style="display:inline-block; padding:8px 15px; background-color:#ff7043; color:white; text-decoration:none; border-radius:4px;">Read More</a>
+            <h3 style="margin:0; color:#d84315; font-family: Georgia, serif;">${title}</h3>
+            <p style="margin:5px 0 10px 0; color:#555555; font-family: Georgia, serif;">${summary} (${source})</p>
+            <a href="${link}" style="display:inline-block; padding:8px 15px; background-color:#ff7043; color:white; text-decoration:none; border-radius:4px;">Read More</a>
         </div>
         """
 
-    # Summaries HTML
-    summaries_html = ""
-    for s in summaries:
-        topic = s.get("topic", "")
-        blurb = s.get("blurb", "")
-        summaries_html += f"""
+SUMMARY_TEMPLATE = """
         <div style="margin-bottom:15px;">
-            <h3 style="color:#bf360c; font-family: Georgia, serif;">{topic}</h3>
-            <p style="color:#555555; font-family: Georgia, serif;">{blurb}</p>
+            <h3 style="color:#bf360c; font-family: Georgia, serif;">${topic}</h3>
+            <p style="color:#555555; font-family: Georgia, serif;">${blurb}</p>
         </div>
         """
 
-    # Trends HTML
-    trends_html = ""
-    for t in trends:
-        trends_html += f"""
+TREND_TEMPLATE = """
         <div style="background-color:#f9f9f9; padding:15px; margin-bottom:15px; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.08);">
-            <h3 style="margin:0; color:#d84315; font-family: Georgia, serif;">{t.get('title','')}</h3>
-            <p style="margin:5px 0 10px 0; color:#555555; font-family: Georgia, serif;">{t.get('explainer','')}</p>
-            <a href="{t.get('link','#')}" style="display:inline-block; padding:8px 15px; background-color:#ff7043; color:white; text-decoration:none; border-radius:4px;">Read More</a>
+            <h3 style="margin:0; color:#d84315; font-family: Georgia, serif;">${title}</h3>
+            <p style="margin:5px 0 10px 0; color:#555555; font-family: Georgia, serif;">${explainer}</p>
+            <a href="${link}" style="display:inline-block; padding:8px 15px; background-color:#ff7043; color:white; text-decoration:none; border-radius:4px;">Read More</a>
         </div>
         """
 
-    html_content = f"""
+NEWSLETTER_TEMPLATE = """
     <html>
     <head>
         <style>
-            body {{
+            body {
                 font-family: Georgia, serif;
                 background-color: #f5f5f5;
                 color: #333333;
                 line-height: 1.6;
                 padding: 20px;
-            }}
-            .container {{
+            }
+            .container {
                 max-width: 600px;
                 margin: 0 auto;
                 background-color: #ffffff;
                 padding: 20px;
                 border-radius: 10px;
                 box-shadow: 0 4px 10px rgba(0,0,0,0.05);
-            }}
-            h1 {{
+            }
+            h1 {
                 color: #bf360c;
                 text-align: center;
                 margin-bottom: 5px;
-            }}
-            h2 {{
+            }
+            h2 {
                 color: #d84315;
                 border-bottom: 2px solid #ffccbc;
                 padding-bottom: 5px;
-            }}
-            p {{
+            }
+            p {
                 margin-bottom: 15px;
-            }}
-            .section {{
+            }
+            .section {
                 margin-bottom: 30px;
-            }}
-            .header-logo {{
+            }
+            .header-logo {
                 display: block;
                 margin: 0 auto 10px auto;
                 max-width: 120px;
-            }}
-            .footer {{
+            }
+            .footer {
                 text-align: center;
                 font-size: 12px;
                 color: #888888;
                 margin-top: 30px;
                 border-top: 1px solid #eeeeee;
                 padding-top: 10px;
-            }}
-            .footer a {{
+            }
+            .footer a {
                 color: #ff7043;
                 text-decoration: none;
                 margin: 0 5px;
-            }}
+            }
         </style>
     </head>
     <body>
         <div class="container">
-            {f'<img src="{logo_url}" class="header-logo">' if logo_url else ''}
-            <h1>{newsletter_title}</h1>
-            <p style="text-align:center; color:#999999; font-size:14px;">{today_str}</p>
+            ${logo}
+            <h1>${newsletter_title}</h1>
+            <p style="text-align:center; color:#999999; font-size:14px;">${today}</p>
 
             <div class="section">
                 <h2>Intro</h2>
-                <p>{intro}</p>
+                <p>${intro}</p>
             </div>
 
             <div class="section">
                 <h2>Curated Links</h2>
-                {curated_html}
+                ${curated_links}
             </div>
 
             <div class="section">
                 <h2>Summaries</h2>
-                {summaries_html}
+                ${summaries}
             </div>
 
             <div class="section">
                 <h2>Commentary</h2>
-                <p>{commentary}</p>
+                <p>${commentary}</p>
             </div>
 
             <div class="section">
                 <h2>Trends to Watch</h2>
-                {trends_html}
+                ${trends}
             </div>
 
             <div class="footer">
@@ -346,4 +330,68 @@ def newsletter_to_html(newsletter_json: dict, logo_url: str = None, newsletter_t
     </html>
     """
 
-    return html_content
\ No newline at end of file
+
+@lru_cache(maxsize=None)
+def newsletter_templates(inline_styles: bool, minify: bool) -> tuple:
+    """The newsletter, curated link, summary and trend templates compiled with the given options"""
+    return (
+        get_compiled_template(NEWSLETTER_TEMPLATE, inline_styles, minify),
+        get_compiled_template(CURATED_LINK_TEMPLATE, inline_styles, minify, {"link": "#"}),
+        get_compiled_template(SUMMARY_TEMPLATE, inline_styles, minify),
+        get_compiled_template(TREND_TEMPLATE, inline_styles, minify, {"link": "#"}),
+    )
+
+
+def compiled_templates() -> tuple:
+    """newsletter_templates with the CSS inlining and minification configured in settings"""
+    options = settings.NEWSLETTER_HTML
+    return newsletter_templates(options['INLINE_CSS'], options['MINIFY'])
+
+
+def render_curated_links_html(curated_links: list) -> str:
+    """Curated links section of the newsletter"""
+    return compiled_templates()[1].render_many(curated_links)
+
+
+def render_summaries_html(summaries: list) -> str:
+    """Per topic summaries section of the newsletter"""
+    return compiled_templates()[2].render_many(summaries)
+
+
+def render_trends_html(trends: list) -> str:
+    """Trends to watch section of the newsletter"""
+    return compiled_templates()[3].render_many(trends)
+
+
+@lru_cache(maxsize=1)
+def format_issue_date(day: datetime.date) -> str:
+    """Date shown under the newsletter title, formatted once a day"""
+    return day.strftime("%B %d, %Y")
+
+
+def newsletter_to_html(newsletter_json: dict, logo_url: str = None, newsletter_title: str = "Your Weekly Digest") -> str:
+    """Convert curated newsletter JSON to modern, single-column newsletter HTML"""
+    return render_newsletters([newsletter_json], logo_url, newsletter_title)[0]
+
+
+def render_newsletters(newsletters: list, logo_url: str = None, newsletter_title: str = "Your Weekly Digest") -> list:
+    """Render many curated newsletters at once, eg for the daily job, returns the HTML of each in order"""
+    template, curated_link_template, summary_template, trend_template = compiled_templates()
+
+    # Shared by every newsletter of the batch
+    today_str = format_issue_date(datetime.date.today())
+    logo_html = f'<img src="{logo_url}" class="header-logo">' if logo_url else ''
+
+    return [
+        template.render({
+            "logo": logo_html,
+            "newsletter_title": newsletter_title,
+            "today": today_str,
+            "intro": newsletter_json.get("intro", ""),
+            "curated_links": curated_link_template.render_many(newsletter_json.get("curated_links", [])),
+            "summaries": summary_template.render_many(newsletter_json.get("summaries", [])),
+            "commentary": newsletter_json.get("commentary", ""),
+            "trends": trend_template.render_many(newsletter_json.get("trends", [])),
+        })
+        for newsletter_json in newsletters
+    ]
@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAT_COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+# Canned completion, a newsletter in the shape the curation prompt asks for
+DEFAULT_NEWSLETTER = {
+    "intro": "A busy week across the topics you follow, with new releases and a few developments worth a closer look.",
+    "curated_links": [
+        {"title": "Benchmark article one", "summary": "What happened and why it matters.",
+         "source": "Example News", "link": "https://news.example.com/one"},
+        {"title": "Benchmark article two", "summary": "A second story worth reading.",
+         "source": "Example Blog", "link": "https://blog.example.com/two"},
+        {"title": "Benchmark article three", "summary": "A third story to round off the week.",
+         "source": "Example Research", "link": "https://research.example.com/three"},
+    ],
+    "summaries": [
+        {"topic": "Artificial Intelligence", "blurb": "Models keep getting smaller and faster."},
+    ],
+    "commentary": "The common thread this week is efficiency, doing the same work with less compute.",
+    "trends": [
+        {"title": "Smaller models", "explainer": "Distilled models close the gap with larger ones.",
+         "link": "https://trends.example.com/small-models"},
+    ],
+}
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    """Answers chat completion requests with the server's canned content, streamed or not"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path.rstrip("/") != CHAT_COMPLETIONS_PATH:
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = "".join(message.get("content", "") for message in body.get("messages", []))
+
+        server = self.server
+        content = server.content
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        with server.lock:
+            server.request_count += 1
+
+        # Time to first token
+        time.sleep(server.latency)
+
+        if body.get("stream"):
+            self._stream(body.get("model", ""), content, usage)
+        else:
+            self._complete(body.get("model", ""), content, usage)
+
+    def _generation_delay(self, tokens):
+        if self.server.tokens_per_second:
+            return tokens / self.server.tokens_per_second
+        return 0
+
+    def _complete(self, model, content, usage):
+        time.sleep(self._generation_delay(usage["completion_tokens"]))
+
+        payload = json.dumps({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": usage,
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, model, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        # About four characters per token, each chunk carries a few tokens
+        pieces = [content[start:start + 16] for start in range(0, len(content), 16)]
+        delay = self._generation_delay(usage["completion_tokens"]) / max(len(pieces), 1)
+
+        for index, piece in enumerate(pieces):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            if index == len(pieces) - 1:
+                chunk["choices"][0]["finish_reason"] = "stop"
+                chunk["x_groq"] = {"id": "req-fake", "usage": usage}
+
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if delay:
+                time.sleep(delay)
+
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Groq chat completions API, point a Groq client at it with base_url=server.url.
+    latency is the delay before the first byte, tokens_per_second paces the completion (0 sends it at once).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, tokens_per_second=0, content=None):
+        super().__init__((host, port), FakeGroqHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.content = content if content is not None else json.dumps(DEFAULT_NEWSLETTER)
+        self.request_count = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,155 @@
+import re
+import threading
+from string import Template
+
+STYLE_BLOCK_PATTERN = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+CSS_RULE_PATTERN = re.compile(r"([^{}]+)\{([^{}]*)\}")
+CSS_COMMENT_PATTERN = re.compile(r"/\*.*?\*/", re.S)
+# A single tag, a class or a tag with a class, the only selectors that are inlined
+SIMPLE_SELECTOR_PATTERN = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*)?(?:\.([\w-]+))?$")
+OPENING_TAG_PATTERN = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)(\s[^<>]*?)?(/?)>")
+CLASS_ATTRIBUTE_PATTERN = re.compile(r"""\bclass\s*=\s*["']([^"']*)["']""")
+STYLE_ATTRIBUTE_PATTERN = re.compile(r"""\bstyle\s*=\s*(["'])(.*?)\1""", re.S)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+BETWEEN_TAGS_PATTERN = re.compile(r">\s+<")
+CSS_PUNCTUATION_PATTERN = re.compile(r"\s*([{};:,])\s*")
+
+
+def css_declarations(declarations):
+    """Normalized "property: value" declarations of a rule body"""
+    return [
+        f"{name.strip()}: {value.strip()}"
+        for name, _, value in (declaration.partition(":") for declaration in declarations.split(";"))
+        if name.strip() and value.strip()
+    ]
+
+
+def parse_css_rules(html):
+    """(tag, class, declarations) of the rules with simple selectors in the style blocks, in source order"""
+    rules = []
+    for style_block in STYLE_BLOCK_PATTERN.findall(html):
+        for selectors, declarations in CSS_RULE_PATTERN.findall(CSS_COMMENT_PATTERN.sub("", style_block)):
+            declarations = css_declarations(declarations)
+            for selector in selectors.split(","):
+                match = SIMPLE_SELECTOR_PATTERN.match(selector.strip())
+                if match and any(match.groups()):
+                    rules.append((match.group(1), match.group(2), declarations))
+    return rules
+
+
+def inline_css(html):
+    """
+    Copy the rules of the style blocks that use a single tag or class selector onto the style attribute
+    of the matching elements, as many email clients ignore style blocks. Declarations already on an element win,
+    descendant and pseudo selectors only stay in the style block, which is left as it is.
+    """
+    rules = parse_css_rules(html)
+    if not rules:
+        return html
+
+    head_end = html.lower().find("</head>")
+
+    def inline_tag(match):
+        # Nothing inside the head is rendered
+        if match.start() < head_end:
+            return match.group(0)
+
+        tag, attributes, closing = match.group(1).lower(), match.group(2) or "", match.group(3)
+        class_match = CLASS_ATTRIBUTE_PATTERN.search(attributes)
+        classes = class_match.group(1).split() if class_match else []
+
+        declarations = []
+        for rule_tag, rule_class, rule_declarations in rules:
+            if (rule_tag is None or rule_tag.lower() == tag) and (rule_class is None or rule_class in classes):
+                declarations.extend(rule_declarations)
+        if not declarations:
+            return match.group(0)
+
+        style_match = STYLE_ATTRIBUTE_PATTERN.search(attributes)
+        if style_match:
+            style = "; ".join(declarations) + "; " + style_match.group(2).strip()
+            attributes = attributes[:style_match.start()] + f'style="{style}"' + attributes[style_match.end():]
+        else:
+            attributes += f' style="{"; ".join(declarations)};"'
+
+        return f"<{match.group(1)}{attributes}{closing}>"
+
+    return OPENING_TAG_PATTERN.sub(inline_tag, html)
+
+
+def minify_html(html):
+    """Collapse the indentation and line breaks of the markup and tighten the style blocks"""
+    html = STYLE_BLOCK_PATTERN.sub(
+        lambda match: match.group(0).replace(
+            match.group(1), CSS_PUNCTUATION_PATTERN.sub(r"\1", CSS_COMMENT_PATTERN.sub("", match.group(1))).strip()
+        ),
+        html,
+    )
+    html = BETWEEN_TAGS_PATTERN.sub("><", html)
+    return WHITESPACE_PATTERN.sub(" ", html).strip()
+
+
+class CompiledTemplate:
+    """
+    Template with ${name} placeholders, split once into its literal parts and placeholders so a render only
+    joins the literals with the context values, missing values fall back to defaults then to "".
+    Optional CSS inlining and minification are applied to the source when it is compiled, not on every render.
+    """
+
+    def __init__(self, source, inline_styles=False, minify=False, defaults=None):
+        if inline_styles:
+            source = inline_css(source)
+        if minify:
+            source = minify_html(source)
+
+        self.source = source
+        self.defaults = defaults or {}
+
+        # Literal text before each placeholder, the text after the last one closes the template
+        self._pieces = []
+        literal = []
+        position = 0
+        for match in Template.pattern.finditer(source):
+            literal.append(source[position:match.start()])
+            if match.group("escaped") is not None:
+                literal.append("$")
+            else:
+                name = match.group("named") or match.group("braced")
+                if name is None:
+                    raise ValueError(f"Invalid placeholder in template at {match.start()}")
+                self._pieces.append(("".join(literal), name, self.defaults.get(name, "")))
+                literal = []
+            position = match.end()
+        literal.append(source[position:])
+        self._tail = "".join(literal)
+
+    def render(self, context):
+        return self.render_many((context,))
+
+    def render_many(self, contexts):
+        """Concatenated renders of every context, eg the items of a newsletter section"""
+        parts = []
+        append = parts.append
+        for context in contexts:
+            get = context.get
+            for literal, name, default in self._pieces:
+                append(literal)
+                append(str(get(name, default)))
+            append(self._tail)
+        return "".join(parts)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_compiled_template(source, inline_styles=False, minify=False, defaults=None):
+    """Compiled template of a source, compiled once per process for each set of options and defaults"""
+    key = (source, inline_styles, minify, tuple(sorted((defaults or {}).items())))
+    template = _templates.get(key)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(key)
+            if template is None:
+                template = _templates[key] = CompiledTemplate(source, inline_styles, minify, defaults)
+    return template
@@ -0,0 +1,122 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from app.newsletter.models import NewsletterGenerationJob
+from app.newsletter.newsletter_utils import generate_newsletter_html
+
+logger = logging.getLogger('scheduler')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process wide pool running the generation jobs"""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.NEWSLETTER_JOBS['MAX_WORKERS'],
+                    thread_name_prefix="newsletter-job"
+                )
+
+    return _executor
+
+
+def submit_generation_job(user_id):
+    """Create a pending job and hand it to the pool once the row is committed"""
+    job = NewsletterGenerationJob.objects.create(user_id=user_id)
+
+    transaction.on_commit(lambda: get_executor().submit(run_generation_job, job.pk))
+
+    return job
+
+
+def run_generation_job(job_id):
+    """
+    Generate the newsletter of a job on a pool thread and store the result on the job.
+    Only a pending job is started, a job resubmitted after a restart runs once.
+    """
+    close_old_connections()
+
+    try:
+        started = NewsletterGenerationJob.objects.filter(pk=job_id, status='PENDING').update(
+            status='RUNNING',
+            started_at=timezone.now(),
+            updated=timezone.now()
+        )
+        if not started:
+            return
+
+        job = NewsletterGenerationJob.objects.get(pk=job_id)
+        html_content = generate_newsletter_html(job.user_id)
+
+        NewsletterGenerationJob.objects.filter(pk=job_id).update(
+            status='SUCCESS',
+            html_content=html_content,
+            finished_at=timezone.now(),
+            updated=timezone.now()
+        )
+
+    except Exception as e:
+        logger.error(f"Newsletter generation job {job_id} failed: {e}")
+        NewsletterGenerationJob.objects.filter(pk=job_id).update(
+            status='FAILED',
+            error_message=str(e),
+            finished_at=timezone.now(),
+            updated=timezone.now()
+        )
+
+    finally:
+        close_old_connections()
+
+
+def fail_stale_jobs(job_queryset=None):
+    """
+    Fail the jobs pending or running for longer than NEWSLETTER_JOBS['TIMEOUT'], their process is gone
+    and clients polling them would otherwise never see them finish. Returns how many were failed.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.NEWSLETTER_JOBS['TIMEOUT'])
+
+    if job_queryset is None:
+        job_queryset = NewsletterGenerationJob.objects.all()
+
+    stale_jobs = job_queryset.filter(status='RUNNING', started_at__lt=cutoff) | \
+        job_queryset.filter(status='PENDING', created__lt=cutoff)
+
+    return stale_jobs.update(
+        status='FAILED',
+        error_message="The job was interrupted before it finished",
+        finished_at=now,
+        updated=now
+    )
+
+
+def recover_generation_jobs():
+    """At startup, fail the jobs lost with a previous process and resubmit the pending ones"""
+    try:
+        failed = fail_stale_jobs()
+
+        pending_ids = list(
+            NewsletterGenerationJob.objects.filter(status='PENDING', is_active=True)
+            .order_by('created').values_list('pk', flat=True)
+        )
+        for job_id in pending_ids:
+            get_executor().submit(run_generation_job, job_id)
+
+        logger.info(f"Recovered newsletter generation jobs: {failed} failed, {len(pending_ids)} resubmitted")
+
+    except Exception as e:
+        logger.error(f"Newsletter generation job recovery failed: {e}")
+
+    finally:
+        close_old_connections()
@@ -0,0 +1,34 @@
+import hashlib
+import re
+
+from django.core.cache import caches
+
+from app.newsletter.llm_json import is_complete_newsletter
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def get_llm_cache():
+    return caches['llm']
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so prompts differing only in layout share an entry"""
+    return WHITESPACE_PATTERN.sub(" ", prompt).strip()
+
+
+def prompt_cache_key(model, prompt):
+    digest = hashlib.sha256(f"{model}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+    return f"llm:newsletter:{digest}"
+
+
+def get_cached_newsletter(model, prompt):
+    """Parsed newsletter JSON of an identical earlier completion, None on a miss"""
+    return get_llm_cache().get(prompt_cache_key(model, prompt))
+
+
+def cache_newsletter(model, prompt, newsletter_json):
+    """Store a parsed completion, outputs that failed to parse or miss sections are not cached"""
+    if not is_complete_newsletter(newsletter_json):
+        return
+    get_llm_cache().set(prompt_cache_key(model, prompt), newsletter_json)
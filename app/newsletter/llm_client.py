@@ -0,0 +1,205 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from groq import Groq
+
+
+class LLMPoolBusyError(Exception):
+    """Raised when the pool queue is full or a request waited longer than the queue timeout"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute, holding at most one minute of tokens.
+    Usage reported after the fact can push it below zero, the next callers then wait for the debt to refill.
+    """
+
+    def __init__(self, rate_per_minute):
+        self.capacity = rate_per_minute
+        self.rate_per_second = rate_per_minute / 60
+        self._tokens = rate_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, amount, deadline):
+        """Take amount tokens, sleeping until they are available, False if the deadline passes first"""
+        # A request larger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return True
+                wait = (amount - self._tokens) / self.rate_per_second
+
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(min(wait, 1))
+
+    def adjust(self, amount):
+        """Take (or give back with a negative amount) tokens without waiting"""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+
+
+class KeySlot:
+    """One API key with its client, its concurrency limit and its rate limits"""
+
+    def __init__(self, api_key, max_concurrency, requests_per_minute, tokens_per_minute, base_url=None):
+        self.client = Groq(api_key=api_key, base_url=base_url)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.in_flight = 0
+
+
+class GroqClientPool:
+    """
+    Shared Groq clients for every curation call of the process.
+
+    A request is admitted to a bounded queue (LLMPoolBusyError when it is full), then takes a global slot,
+    a slot on the least busy key and that key's request and token budgets before it is sent.
+    Clients keep their HTTP connections across calls instead of being created per call.
+    """
+
+    def __init__(self, api_keys, max_concurrency=None, per_key_concurrency=None, requests_per_minute=None,
+                 tokens_per_minute=None, max_queue=None, queue_timeout=None, base_url=None):
+        config = settings.LLM_CLIENT
+        if not api_keys:
+            raise ValueError("No Groq API key configured, set GROQ_API_KEYS or GROQ_API_KEY")
+
+        self.slots = [
+            KeySlot(
+                api_key,
+                per_key_concurrency or config['PER_KEY_CONCURRENCY'],
+                requests_per_minute or config['REQUESTS_PER_MINUTE'],
+                tokens_per_minute or config['TOKENS_PER_MINUTE'],
+                base_url,
+            )
+            for api_key in api_keys
+        ]
+        self.max_queue = max_queue or config['MAX_QUEUE']
+        self.queue_timeout = queue_timeout or config['QUEUE_TIMEOUT']
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency or config['MAX_CONCURRENCY'])
+        self._lock = threading.Lock()
+        self._admitted = 0
+
+    def _admit(self):
+        with self._lock:
+            if self._admitted >= self.max_queue:
+                raise LLMPoolBusyError(f"LLM request queue is full ({self.max_queue} requests)")
+            self._admitted += 1
+
+    def _release_admission(self):
+        with self._lock:
+            self._admitted -= 1
+
+    def _acquire_slot(self, deadline):
+        """Least busy key with a free slot, waits for one until the deadline"""
+        while True:
+            with self._lock:
+                for slot in sorted(self.slots, key=lambda slot: slot.in_flight):
+                    if slot.semaphore.acquire(blocking=False):
+                        slot.in_flight += 1
+                        return slot
+
+            if time.monotonic() > deadline:
+                raise LLMPoolBusyError("Timed out waiting for a free API key slot")
+            time.sleep(0.05)
+
+    def _release_slot(self, slot):
+        with self._lock:
+            slot.in_flight -= 1
+        slot.semaphore.release()
+
+    @contextmanager
+    def lease(self, estimated_tokens, queue_timeout=None):
+        """
+        Hold a client for one request of about estimated_tokens tokens (prompt and completion).
+        Streams must be consumed inside the block, the slot is held until it exits.
+        queue_timeout overrides the pool's wait limit, eg for batch jobs that can wait longer than a user.
+        """
+        queue_timeout = queue_timeout or self.queue_timeout
+
+        self._admit()
+        try:
+            deadline = time.monotonic() + queue_timeout
+            if not self._semaphore.acquire(timeout=queue_timeout):
+                raise LLMPoolBusyError("Timed out waiting for a free LLM slot")
+
+            try:
+                slot = self._acquire_slot(deadline)
+                try:
+                    if not slot.requests.acquire(1, deadline) or not slot.tokens.acquire(estimated_tokens, deadline):
+                        raise LLMPoolBusyError("Timed out waiting for the API rate limits")
+                    yield slot
+                finally:
+                    self._release_slot(slot)
+            finally:
+                self._semaphore.release()
+        finally:
+            self._release_admission()
+
+    def chat_completion(self, estimated_tokens, queue_timeout=None, **kwargs):
+        """Blocking chat completion through a leased client"""
+        with self.lease(estimated_tokens, queue_timeout) as slot:
+            response = slot.client.chat.completions.create(**kwargs)
+            self.settle(slot, estimated_tokens, getattr(response, "usage", None))
+            return response
+
+    def settle(self, slot, estimated_tokens, usage):
+        """Correct the key's token budget with the usage reported by the provider"""
+        if usage is None or getattr(usage, "total_tokens", None) is None:
+            return
+        slot.tokens.adjust(usage.total_tokens - min(estimated_tokens, slot.tokens.capacity))
+
+    async def achat_completion(self, estimated_tokens, **kwargs):
+        """chat_completion for async callers, the wait and the request run on a worker thread"""
+        return await asyncio.to_thread(self.chat_completion, estimated_tokens, **kwargs)
+
+
+def get_api_keys():
+    """Comma separated GROQ_API_KEYS, falls back to the single GROQ_API_KEY"""
+    keys = [key.strip() for key in os.getenv("GROQ_API_KEYS", "").split(",") if key.strip()]
+    if not keys and os.getenv("GROQ_API_KEY"):
+        keys = [os.getenv("GROQ_API_KEY")]
+    return keys
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool():
+    """Process wide client pool"""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = GroqClientPool(get_api_keys())
+
+    return _pool
+
+
+def set_llm_pool(pool):
+    """Replace the process wide pool, eg with one pointing at a fake server, returns the previous one"""
+    global _pool
+
+    with _pool_lock:
+        previous, _pool = _pool, pool
+
+    return previous
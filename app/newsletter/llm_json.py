@@ -0,0 +1,265 @@
+import json
+
+# Sections of the newsletter JSON asked for in the curation prompt.
+# A string section holds text, a list section holds objects with the given fields, the first one is required.
+NEWSLETTER_SCHEMA = {
+    "intro": str,
+    "curated_links": ["title", "summary", "source", "link"],
+    "summaries": ["topic", "blurb"],
+    "commentary": str,
+    "trends": ["title", "explainer", "link"],
+}
+
+
+def validate_section(name, value, schema=NEWSLETTER_SCHEMA):
+    """
+    Cleaned value of a section, None when it does not match the schema.
+    Items of a list section missing their required field are dropped, other fields are kept when they are strings
+    and left out otherwise, so the renderers apply their own defaults.
+    """
+    expected = schema.get(name)
+    if expected is None:
+        return None
+
+    if expected is str:
+        return value.strip() if isinstance(value, str) else None
+
+    if not isinstance(value, list):
+        return None
+
+    required, *optional = expected
+    items = []
+    for item in value:
+        if not isinstance(item, dict) or not isinstance(item.get(required), str):
+            continue
+        items.append({
+            field: item[field]
+            for field in [required] + optional
+            if isinstance(item.get(field), str)
+        })
+    return items
+
+
+def is_complete_newsletter(newsletter_json, schema=NEWSLETTER_SCHEMA):
+    """True when every section of the schema is present"""
+    return all(name in newsletter_json for name in schema)
+
+
+class IncrementalNewsletterParser:
+    """
+    Tolerant, incremental parser of the newsletter JSON produced by the LLM.
+
+    Text is fed as it streams in and every top level section is parsed and validated as soon as its value
+    is complete, so sections can be rendered before the completion ends. Text around the JSON object
+    (code fences, a sentence of preamble) is skipped. When the output is cut off, finish() keeps the
+    complete items of a list section that was still open.
+    """
+
+    def __init__(self, schema=NEWSLETTER_SCHEMA):
+        self.schema = schema
+        self.sections = {}
+
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+        # Top level object: expecting a key, the colon, a value or the comma after it
+        self._state = "key"
+        self._key = None
+        self._token_start = None
+        self._value_kind = None
+        self._item_end = None
+
+    def feed(self, text):
+        """Add text, returns the (name, value) pairs of the sections completed by it"""
+        self._buffer += text
+        completed = []
+
+        buffer = self._buffer
+        position = self._position
+        while position < len(buffer) and not self._done:
+            self._scan(buffer, position, completed)
+            position += 1
+
+        self._position = position
+        return completed
+
+    def _scan(self, buffer, position, completed):
+        char = buffer[position]
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1:
+                    self._end_top_level_string(buffer, position, completed)
+            return
+
+        if self._depth == 0:
+            # Anything before the object, eg a code fence
+            if char == "{":
+                self._depth = 1
+            return
+
+        if self._depth == 1:
+            self._scan_top_level(buffer, position, char, completed)
+            return
+
+        # Inside a container value
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 1:
+                self._complete(buffer[self._token_start:position + 1], completed)
+                self._state = "comma"
+            elif self._depth == 2:
+                # An item of the container is complete
+                self._item_end = position + 1
+
+    def _scan_top_level(self, buffer, position, char, completed):
+        if self._state == "value" and self._value_kind == "literal":
+            if char in ",}":
+                self._complete(buffer[self._token_start:position], completed)
+                self._state = "key"
+                if char == "}":
+                    self._done = True
+            return
+
+        if char.isspace():
+            return
+
+        if self._state == "key":
+            if char == '"':
+                self._in_string = True
+                self._token_start = position
+            elif char == "}":
+                self._done = True
+            elif self._key is None:
+                # A brace of the preamble, eg "Here is {the} newsletter", keep looking for the object
+                self._depth = 0
+
+        elif self._state == "colon":
+            if char == ":":
+                self._state = "value"
+                self._value_kind = None
+
+        elif self._state == "value":
+            self._token_start = position
+            self._item_end = None
+            if char == '"':
+                self._value_kind = "string"
+                self._in_string = True
+            elif char in "{[":
+                self._value_kind = "container"
+                self._depth += 1
+            else:
+                self._value_kind = "literal"
+
+        elif self._state == "comma":
+            if char == ",":
+                self._state = "key"
+            elif char == "}":
+                self._done = True
+
+    def _end_top_level_string(self, buffer, position, completed):
+        text = buffer[self._token_start:position + 1]
+
+        if self._state == "key":
+            try:
+                self._key = json.loads(text)
+            except json.JSONDecodeError:
+                self._key = None
+            self._state = "colon"
+
+        elif self._state == "value":
+            self._complete(text, completed)
+            self._state = "comma"
+
+    def _complete(self, text, completed):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return
+
+        self._add_section(self._key, value, completed)
+
+    def _add_section(self, name, value, completed):
+        value = validate_section(name, value, self.schema)
+        if value is None:
+            return
+
+        self.sections[name] = value
+        completed.append((name, value))
+
+    def finish(self):
+        """
+        Sections parsed from everything fed, returns (sections, salvaged) where salvaged are the
+        (name, value) pairs recovered from a list section cut off by the end of the text.
+        """
+        salvaged = []
+
+        cut_off_list = (
+            not self._done and self._state == "value" and self._value_kind == "container"
+            and self._buffer[self._token_start] == "[" and self._item_end is not None
+        )
+        if cut_off_list:
+            try:
+                value = json.loads(self._buffer[self._token_start:self._item_end] + "]")
+            except json.JSONDecodeError:
+                value = None
+            if value is not None:
+                self._add_section(self._key, value, salvaged)
+
+        return self.sections, salvaged
+
+
+def strip_code_fence(content):
+    """Content of a ```json fenced block, the text itself when it is not fenced"""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else ""
+        if content.rstrip().endswith("```"):
+            content = content.rstrip()[:-3]
+    return content.strip()
+
+
+def parse_newsletter_json(content, schema=NEWSLETTER_SCHEMA):
+    """
+    Newsletter sections found in the LLM output, validated against the schema.
+    Well formed output is parsed directly, on its own, fenced or from the first '{"' after a preamble,
+    otherwise the tolerant parser recovers whatever sections are intact.
+    Returns an empty dict when nothing could be recovered.
+    """
+    try:
+        data = json.loads(strip_code_fence(content))
+    except json.JSONDecodeError:
+        data = None
+
+    start = content.find('{"')
+    if data is None and start != -1:
+        try:
+            data, _ = json.JSONDecoder().raw_decode(content, start)
+        except json.JSONDecodeError:
+            data = None
+
+    if isinstance(data, dict):
+        sections = {}
+        for name, value in data.items():
+            value = validate_section(name, value, schema)
+            if value is not None:
+                sections[name] = value
+        return sections
+
+    parser = IncrementalNewsletterParser(schema)
+    parser.feed(content)
+    sections, _ = parser.finish()
+    return sections
@@ -0,0 +1,169 @@
+import math
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.global_constants import TOPIC_TRENDS_RSS_URLS
+from app.newsletter.ai_curator import curate_newsletter, rank_articles
+from app.newsletter.email_sender import newsletter_to_html
+from app.newsletter.fake_groq_server import FakeGroqServer
+from app.newsletter.llm_client import GroqClientPool, set_llm_pool
+from app.scrape.article_store import dedupe_articles
+from app.scrape.content_cache import article_content_cache
+from app.scrape.fetch_engine import scrape_sources, fetch_trends
+from app.scrape.http_fixtures import HTTP_FIXTURES_DIR, ReplayAdapter, RecordingAdapter, install_adapter, \
+    load_manifest, save_manifest
+from app.scrape.near_duplicates import drop_near_duplicates
+from app.source.models import Source
+from app.topic.models import Topic
+
+STAGES = ["scrape", "dedupe", "rank", "curate", "render", "total"]
+
+# The fake server has no provider limits, the pool only bounds the concurrency
+UNLIMITED_RATE = 10 ** 9
+
+
+def percentile(timings, percent):
+    """Nearest rank percentile"""
+    ordered = sorted(timings)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the scrape -> rank -> curate -> render pipeline offline, "
+        "the scrapers replay recorded HTTP fixtures and the LLM is a local fake Groq server"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=10)
+        parser.add_argument("--warmup", type=int, default=1, help="Runs before the measured ones")
+        parser.add_argument("--fixtures", type=str, default=str(HTTP_FIXTURES_DIR), help="HTTP fixture directory")
+        parser.add_argument("--http-latency", type=float, default=0.0, help="Seconds added to every replayed request")
+        parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds before the fake LLM answers")
+        parser.add_argument("--llm-tokens-per-second", type=float, default=0, help="Fake completion pacing, 0 for none")
+        parser.add_argument("--warm", action="store_true",
+                            help="Keep the article and LLM caches between runs instead of starting each run cold")
+        parser.add_argument("--record", action="store_true",
+                            help="Record fresh fixtures from the live sources in the database and exit")
+
+    def handle(self, *args, **options):
+        fixtures_dir = Path(options["fixtures"])
+
+        if options["record"]:
+            self.record(fixtures_dir)
+            return
+
+        manifest = load_manifest(fixtures_dir)
+        install_adapter(ReplayAdapter(fixtures_dir, latency=options["http_latency"]))
+
+        server = FakeGroqServer(
+            latency=options["llm_latency"],
+            tokens_per_second=options["llm_tokens_per_second"],
+        ).start()
+        previous_pool = set_llm_pool(GroqClientPool(
+            ["benchmark"],
+            requests_per_minute=UNLIMITED_RATE,
+            tokens_per_minute=UNLIMITED_RATE,
+            base_url=server.url,
+        ))
+
+        timings = {stage: [] for stage in STAGES}
+        try:
+            # The call logs written by the curation are rolled back
+            with transaction.atomic():
+                for _ in range(options["warmup"]):
+                    self.run_pipeline(manifest, options["warm"])
+
+                started = time.perf_counter()
+                for _ in range(options["iterations"]):
+                    for stage, elapsed in self.run_pipeline(manifest, options["warm"]).items():
+                        timings[stage].append(elapsed)
+                wall_time = time.perf_counter() - started
+
+                transaction.set_rollback(True)
+        finally:
+            set_llm_pool(previous_pool)
+            server.stop()
+
+        self.report(timings, wall_time, options["iterations"])
+
+    def run_pipeline(self, manifest, warm):
+        """One newsletter from the fixture sources, returns the milliseconds spent in each stage"""
+        if not warm:
+            caches['llm'].clear()
+            article_content_cache.discard(list(manifest["responses"]))
+
+        topics = manifest["topics"]
+        timings = {}
+        start = stage_start = time.perf_counter()
+
+        def lap(stage):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[stage] = (now - stage_start) * 1000
+            stage_start = now
+
+        articles = scrape_sources([tuple(source) for source in manifest["sources"]])
+        top_trends = fetch_trends(manifest["trends"])
+        lap("scrape")
+
+        articles = drop_near_duplicates(dedupe_articles(articles))
+        lap("dedupe")
+
+        rank_articles(articles, topics)
+        lap("rank")
+
+        newsletter_content = curate_newsletter(articles, topics, top_trends)
+        lap("curate")
+
+        newsletter_to_html(newsletter_content)
+        lap("render")
+
+        timings["total"] = (time.perf_counter() - start) * 1000
+        return timings
+
+    def report(self, timings, wall_time, iterations):
+        self.stdout.write(f"{'stage':<10}{'p50 ms':>12}{'p95 ms':>12}{'mean ms':>12}")
+        for stage in STAGES:
+            values = timings[stage]
+            self.stdout.write(
+                f"{stage:<10}{percentile(values, 50):>12.2f}{percentile(values, 95):>12.2f}"
+                f"{statistics.mean(values):>12.2f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{iterations} newsletters in {wall_time:.2f} s, throughput {iterations / wall_time:.2f} newsletters/s"
+        ))
+
+    def record(self, fixtures_dir):
+        """Fetch the active sources and trend feeds once through a recording adapter and write the manifest"""
+        sources = list(Source.objects.filter(is_active=True).order_by("id").values_list("url", "source_type"))
+        topics = list(Topic.objects.filter(is_active=True).order_by("id").values_list("name", flat=True))
+        trends = list(TOPIC_TRENDS_RSS_URLS.values())
+
+        adapter = RecordingAdapter(
+            fixtures_dir,
+            pool_connections=settings.SCRAPE_HTTP['POOL_CONNECTIONS'],
+            pool_maxsize=settings.SCRAPE_HTTP['POOL_MAXSIZE'],
+        )
+        install_adapter(adapter)
+
+        scrape_sources(sources)
+        fetch_trends(trends)
+
+        save_manifest({
+            "topics": topics,
+            "sources": [list(source) for source in sources],
+            "trends": trends,
+            "responses": adapter.responses,
+        }, fixtures_dir)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Recorded {len(adapter.responses)} responses for {len(sources)} sources in {fixtures_dir}"
+        ))
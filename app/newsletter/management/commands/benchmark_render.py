@@ -0,0 +1,233 @@
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.newsletter.email_sender import NEWSLETTER_TEMPLATE, newsletter_to_html, render_newsletters
+from app.newsletter.fake_groq_server import DEFAULT_NEWSLETTER
+from app.newsletter.html_template import CompiledTemplate
+
+# Baseline: the string concatenation renderer, kept here to benchmark the compiled templates against
+
+
+def legacy_render_curated_links_html(curated_links: list) -> str:
+    """Curated links section of the newsletter"""
+    curated_html = ""
+    for link in curated_links:
+        curated_html += f"""
+        <div style="background-color:#ffffff; padding:15px; margin-bottom:15px; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">
+            <h3 style="margin:0; color:#d84315; font-family: Georgia, serif;">{link.get('title','')}</h3>
+            <p style="margin:5px 0 10px 0; color:#555555; font-family: Georgia, serif;">{link.get('summary','')} ({link.get('source','')})</p>
+            <a href="{link.get('link','#')}" style="display:inline-block; padding:8px 15px; background-color:#ff7043; color:white; text-decoration:none; border-radius:4px;">Read More</a>
+        </div>
+        """
+
+    return curated_html
+
+
+def legacy_render_summaries_html(summaries: list) -> str:
+    """Per topic summaries section of the newsletter"""
+    summaries_html = ""
+    for s in summaries:
+        topic = s.get("topic", "")
+        blurb = s.get("blurb", "")
+        summaries_html += f"""
+        <div style="margin-bottom:15px;">
+            <h3 style="color:#bf360c; font-family: Georgia, serif;">{topic}</h3>
+            <p style="color:#555555; font-family: Georgia, serif;">{blurb}</p>
+        </div>
+        """
+
+    return summaries_html
+
+
+def legacy_render_trends_html(trends: list) -> str:
+    """Trends to watch section of the newsletter"""
+    trends_html = ""
+    for t in trends:
+        trends_html += f"""
+        <div style="background-color:#f9f9f9; padding:15px; margin-bottom:15px; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.08);">
+            <h3 style="margin:0; color:#d84315; font-family: Georgia, serif;">{t.get('title','')}</h3>
+            <p style="margin:5px 0 10px 0; color:#555555; font-family: Georgia, serif;">{t.get('explainer','')}</p>
+            <a href="{t.get('link','#')}" style="display:inline-block; padding:8px 15px; background-color:#ff7043; color:white; text-decoration:none; border-radius:4px;">Read More</a>
+        </div>
+        """
+
+    return trends_html
+
+
+def legacy_newsletter_to_html(newsletter_json: dict, logo_url: str = None, newsletter_title: str = "Your Weekly Digest") -> str:
+    """The f-string renderer newsletter_to_html replaced"""
+
+    intro = newsletter_json.get("intro", "")
+    curated_links = newsletter_json.get("curated_links", [])
+    summaries = newsletter_json.get("summaries", [])
+    commentary = newsletter_json.get("commentary", "")
+    trends = newsletter_json.get("trends", [])
+
+    today_str = datetime.datetime.now().strftime("%B %d, %Y")
+
+    # Section HTML
+    curated_html = legacy_render_curated_links_html(curated_links)
+    summaries_html = legacy_render_summaries_html(summaries)
+    trends_html = legacy_render_trends_html(trends)
+
+    html_content = f"""
+    <html>
+    <head>
+        <style>
+            body {{
+                font-family: Georgia, serif;
+                background-color: #f5f5f5;
+                color: #333333;
+                line-height: 1.6;
+                padding: 20px;
+            }}
+            .container {{
+                max-width: 600px;
+                margin: 0 auto;
+                background-color: #ffffff;
+                padding: 20px;
+                border-radius: 10px;
+                box-shadow: 0 4px 10px rgba(0,0,0,0.05);
+            }}
+            h1 {{
+                color: #bf360c;
+                text-align: center;
+                margin-bottom: 5px;
+            }}
+            h2 {{
+                color: #d84315;
+                border-bottom: 2px solid #ffccbc;
+                padding-bottom: 5px;
+            }}
+            p {{
+                margin-bottom: 15px;
+            }}
+            .section {{
+                margin-bottom: 30px;
+            }}
+            .header-logo {{
+                display: block;
+                margin: 0 auto 10px auto;
+                max-width: 120px;
+            }}
+            .footer {{
+                text-align: center;
+                font-size: 12px;
+                color: #888888;
+                margin-top: 30px;
+                border-top: 1px solid #eeeeee;
+                padding-top: 10px;
+            }}
+            .footer a {{
+                color: #ff7043;
+                text-decoration: none;
+                margin: 0 5px;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            {f'<img src="{logo_url}" class="header-logo">' if logo_url else ''}
+            <h1>{newsletter_title}</h1>
+            <p style="text-align:center; color:#999999; font-size:14px;">{today_str}</p>
+
+            <div class="section">
+                <h2>Intro</h2>
+                <p>{intro}</p>
+            </div>
+
+            <div class="section">
+                <h2>Curated Links</h2>
+                {curated_html}
+            </div>
+
+            <div class="section">
+                <h2>Summaries</h2>
+                {summaries_html}
+            </div>
+
+            <div class="section">
+                <h2>Commentary</h2>
+                <p>{commentary}</p>
+            </div>
+
+            <div class="section">
+                <h2>Trends to Watch</h2>
+                {trends_html}
+            </div>
+
+            <div class="footer">
+                <p>
+                    <a href="#">Unsubscribe</a> | <a href="#">Contact Us</a>
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+    return html_content
+
+
+def sample_newsletter(index):
+    """A newsletter shaped like a curated one, distinct per index so nothing is shared between renders"""
+    return {
+        "intro": f"{DEFAULT_NEWSLETTER['intro']} ({index})",
+        "curated_links": [dict(link, title=f"{link['title']} {index}") for link in DEFAULT_NEWSLETTER["curated_links"]],
+        "summaries": DEFAULT_NEWSLETTER["summaries"] * 3,
+        "commentary": DEFAULT_NEWSLETTER["commentary"],
+        "trends": DEFAULT_NEWSLETTER["trends"] * 3,
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark the compiled newsletter templates against the string concatenation renderer they replaced"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Measured runs of each renderer")
+        parser.add_argument("--batch", type=int, default=100, help="Newsletters rendered per run")
+
+    def handle(self, *args, **options):
+        newsletters = [sample_newsletter(index) for index in range(options["batch"])]
+
+        # Without inlining and minification the compiled templates produce the same HTML
+        for newsletter_json in newsletters[:3]:
+            if newsletter_to_html(newsletter_json) != legacy_newsletter_to_html(newsletter_json):
+                self.stderr.write(self.style.WARNING(
+                    "Compiled output differs from the baseline, is NEWSLETTER_HTML_INLINE_CSS or _MINIFY set?"
+                ))
+                break
+
+        renderers = {
+            "legacy": lambda: [legacy_newsletter_to_html(newsletter_json) for newsletter_json in newsletters],
+            "compiled": lambda: [newsletter_to_html(newsletter_json) for newsletter_json in newsletters],
+            "batch": lambda: render_newsletters(newsletters),
+        }
+
+        # Compile the templates outside of the measured runs
+        for render in renderers.values():
+            render()
+
+        self.stdout.write(f"{'renderer':<10}{'p50 ms':>12}{'mean ms':>12}{'us/newsletter':>16}")
+        for name, render in renderers.items():
+            timings = []
+            for _ in range(options["iterations"]):
+                started = time.perf_counter()
+                render()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            mean = statistics.mean(timings)
+            self.stdout.write(
+                f"{name:<10}{statistics.median(timings):>12.2f}{mean:>12.2f}{mean * 1000 / len(newsletters):>16.1f}"
+            )
+
+        # Paid once per process and set of options
+        started = time.perf_counter()
+        CompiledTemplate(NEWSLETTER_TEMPLATE, inline_styles=True, minify=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Compiling the newsletter template with CSS inlining and minification takes "
+            f"{(time.perf_counter() - started) * 1000:.2f} ms"
+        ))
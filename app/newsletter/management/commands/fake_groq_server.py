@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from app.newsletter.fake_groq_server import FakeGroqServer
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the Groq chat completions API, point GROQ_BASE_URL at it"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first byte")
+        parser.add_argument("--tokens-per-second", type=float, default=0, help="Completion pacing, 0 sends it at once")
+        parser.add_argument("--response", type=str, help="JSON file with the completion to return")
+
+    def handle(self, *args, **options):
+        content = None
+        if options["response"]:
+            with open(options["response"], encoding="utf-8") as response_file:
+                content = json.dumps(json.load(response_file))
+
+        server = FakeGroqServer(
+            port=options["port"],
+            latency=options["latency"],
+            tokens_per_second=options["tokens_per_second"],
+            content=content,
+        )
+
+        self.stdout.write(f"Fake Groq API listening on {server.url}")
+        self.stdout.write(f"Run the app with GROQ_BASE_URL={server.url} GROQ_API_KEY=fake to use it")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
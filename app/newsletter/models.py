@@ -76,3 +76,60 @@ class NewsletterSchedule(models.Model):
     updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Due schedules claimed by the scheduler, finished schedules are left out of the index
+            models.Index(
+                fields=['start_time', 'draft'],
+                name='schedule_active_due_idx',
+                condition=models.Q(is_active=True)
+            ),
+        ]
+
+
+class NewsletterGenerationJob(models.Model):
+    """
+    Newsletter generation run by the background workers, polled by the client until it finishes.
+    """
+
+    # Foreign Key
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='generation_jobs', related_query_name='generation_job')
+
+    #Field declarations
+    status = models.CharField(max_length=20, choices=[
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Success'),
+        ('FAILED', 'Failed')
+    ], default='PENDING')
+    html_content = models.TextField(blank=True)
+    error_message = models.TextField(blank=True, null=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    #Additional fields
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
+
+
+class LLMCallLog(models.Model):
+    """
+    Estimated and provider reported token counts of a curation call, used to tune the prompt budget.
+    """
+
+    # Foreign Key
+    user = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True, blank=True, related_name='llm_calls', related_query_name='llm_call')
+
+    #Field declarations
+    model = models.CharField(max_length=100)
+    estimated_prompt_tokens = models.PositiveIntegerField()
+    estimated_completion_tokens = models.PositiveIntegerField()
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+
+    #Additional fields
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
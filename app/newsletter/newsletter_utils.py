@@ -0,0 +1,103 @@
+from app.newsletter.ai_curator import curate_newsletter, rank_articles, stream_curate_newsletter
+from app.newsletter.email_sender import newsletter_to_html, render_curated_links_html, render_summaries_html, \
+    render_trends_html
+from app.sample.sample_utils import style_fingerprints
+from app.scrape.scrape_cache import get_topic_articles, get_topic_trends
+from app.topic.models import UserTopic
+
+
+# HTML of each newsletter section, as streamed by iter_newsletter_generation
+SECTION_RENDERERS = {
+    "intro": lambda intro: intro,
+    "curated_links": render_curated_links_html,
+    "summaries": render_summaries_html,
+    "commentary": lambda commentary: commentary,
+    "trends": render_trends_html,
+}
+
+
+def get_user_topics(user_id):
+    """Topic ids and names selected by a user"""
+    user_topic_queryset = UserTopic.objects.select_related("topic") \
+        .filter(user_id=user_id)
+
+    topic_ids = [ut.topic.id for ut in user_topic_queryset]
+    topics = [ut.topic.name for ut in user_topic_queryset]
+
+    return topic_ids, topics
+
+
+def group_users_by_profile(user_ids):
+    """
+    Group users that would get the same newsletter, ie the same topic set and style samples.
+    Returns a list of dicts with the topic_ids, topics and user_ids of each group, in order of first member.
+    """
+    topics_by_user = {user_id: {} for user_id in user_ids}
+    user_topic_queryset = UserTopic.objects.select_related("topic").filter(user_id__in=user_ids)
+    for user_topic in user_topic_queryset:
+        topics_by_user[user_topic.user_id][user_topic.topic.id] = user_topic.topic.name
+
+    fingerprints = style_fingerprints(user_ids)
+
+    groups = {}
+    for user_id in user_ids:
+        user_topics = topics_by_user[user_id]
+        profile = (frozenset(user_topics), fingerprints[user_id])
+        if profile not in groups:
+            topic_ids = sorted(user_topics)
+            groups[profile] = {
+                "topic_ids": topic_ids,
+                "topics": [user_topics[topic_id] for topic_id in topic_ids],
+                "user_ids": [],
+            }
+        groups[profile]["user_ids"].append(user_id)
+
+    return list(groups.values())
+
+
+def generate_newsletter_html(user_id):
+    """Scrape the user's topics, curate them with the LLM and render the newsletter HTML"""
+    topic_ids, topics = get_user_topics(user_id)
+
+    # scrape the news and the top trends, sources already scraped for these topics come from the cache
+    articles = get_topic_articles(topic_ids)
+    top_trends = get_topic_trends(topic_ids)
+
+    newsletter_content = curate_newsletter(articles, topics, top_trends, user_id=user_id)
+
+    return newsletter_to_html(newsletter_content)
+
+
+def iter_newsletter_generation(user_id):
+    """
+    Run the same pipeline as generate_newsletter_html, yielding (event, data) pairs as each step completes:
+    started, sources, ranked, token (one per LLM chunk), section (one per rendered section) and done
+    with the full HTML. A failure ends the stream with an error event.
+    """
+    yield "started", {"user_id": user_id}
+
+    try:
+        topic_ids, topics = get_user_topics(user_id)
+
+        articles = get_topic_articles(topic_ids)
+        top_trends = get_topic_trends(topic_ids)
+        yield "sources", {"topics": topics, "articles": len(articles), "trends": len(top_trends)}
+
+        top_articles = rank_articles(articles, topics)
+        yield "ranked", {"titles": [article.get("title", "") for article in top_articles]}
+
+        # Each section is rendered as soon as the LLM has finished writing it
+        newsletter_content = {}
+        for event, data in stream_curate_newsletter(top_articles, topics, top_trends, user_id=user_id):
+            if event == "token":
+                yield "token", {"text": data}
+            elif event == "section":
+                name, value = data
+                yield "section", {"name": name, "html": SECTION_RENDERERS[name](value)}
+            else:
+                newsletter_content = data
+
+        yield "done", {"html": newsletter_to_html(newsletter_content)}
+
+    except Exception as e:
+        yield "error", {"message": str(e)}
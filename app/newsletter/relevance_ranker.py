@@ -0,0 +1,120 @@
+import math
+import re
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Byte translation table keeping the bytes of TOKEN_PATTERN and turning every other byte into a space
+TOKEN_BYTES = bytes(byte if chr(byte).isascii() and chr(byte).isalnum() else ord(" ") for byte in range(256))
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class RelevanceRanker:
+    """
+    Scores articles against the user's topics with BM25.
+
+    Every article is tokenized once into a term matrix over the topic vocabulary (articles x terms),
+    the BM25 weights are computed on the whole matrix and multiplied with the topic term vectors,
+    giving the score of every article for every topic in a single matrix product.
+    """
+
+    def __init__(self, articles, user_topics, k1=BM25_K1, b=BM25_B):
+        self.articles = articles
+        self.user_topics = user_topics
+
+        topic_terms = [tokenize(topic) for topic in user_topics]
+        self.vocabulary = {}
+        for terms in topic_terms:
+            for term in terms:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        # Topic term vectors, a topic's terms share its weight so long topic names do not dominate
+        self.topic_matrix = np.zeros((len(user_topics), len(self.vocabulary)))
+        for topic_index, terms in enumerate(topic_terms):
+            for term in set(terms):
+                self.topic_matrix[topic_index, self.vocabulary[term]] = 1 / len(set(terms))
+
+        self.scores = self._score(k1, b)
+
+    def _term_matrix(self):
+        """Counts of the vocabulary terms per article and the length of every article in tokens"""
+        counts = np.zeros((len(self.articles), len(self.vocabulary)))
+        lengths = np.zeros(len(self.articles))
+
+        # Byte strings with one token per double-space separated slot, so each term is counted
+        # by the C level bytes.count instead of building per token Python objects
+        term_needles = [b" " + term.encode() + b" " for term in self.vocabulary]
+
+        for row, article in enumerate(self.articles):
+            text = (article.get("content", "") + " " + article.get("title", "")).lower()
+            tokens = text.encode("utf-8", "ignore").translate(TOKEN_BYTES).split()
+            lengths[row] = len(tokens)
+            padded = b" " + b"  ".join(tokens) + b" "
+            counts[row] = [padded.count(needle) for needle in term_needles]
+
+        return counts, lengths
+
+    def _score(self, k1, b):
+        """BM25 score of every article for every topic, shape (articles, topics)"""
+        if not self.articles or not self.vocabulary:
+            return np.zeros((len(self.articles), len(self.user_topics)))
+
+        counts, lengths = self._term_matrix()
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        idf = np.log(1 + (len(self.articles) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        average_length = lengths.mean() or 1
+        length_norm = k1 * (1 - b + b * lengths / average_length)
+        weights = idf * counts * (k1 + 1) / (counts + length_norm[:, None])
+
+        return weights @ self.topic_matrix.T
+
+    def rank(self, max_articles=3, per_topic_quota=None):
+        """
+        Top articles by total score across topics.
+        With a per_topic_quota each article counts against its best matching topic and a topic
+        takes at most that many slots, slots left over are filled by the best remaining articles.
+        """
+        if not self.articles:
+            return []
+
+        total_scores = self.scores.sum(axis=1)
+        # Stable sort keeps the original order of equally relevant articles
+        order = np.argsort(-total_scores, kind="stable")
+
+        if per_topic_quota is None or not self.user_topics:
+            return [self.articles[index] for index in order[:max_articles]]
+
+        best_topics = self.scores.argmax(axis=1)
+        topic_counts = np.zeros(len(self.user_topics), dtype=int)
+        selected = []
+        for index in order:
+            if len(selected) >= max_articles:
+                break
+            topic = best_topics[index]
+            if topic_counts[topic] < per_topic_quota:
+                topic_counts[topic] += 1
+                selected.append(index)
+
+        for index in order:
+            if len(selected) >= max_articles:
+                break
+            if index not in selected:
+                selected.append(index)
+
+        selected.sort(key=lambda index: -total_scores[index])
+        return [self.articles[index] for index in selected]
+
+
+def default_topic_quota(max_articles, user_topics):
+    """Even share of the slots per topic, rounded up"""
+    return max(1, math.ceil(max_articles / max(len(user_topics), 1)))
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from app.newsletter.models import NewsletterTemplate, NewsletterDraft, NewsletterSchedule
+from app.newsletter.models import NewsletterTemplate, NewsletterDraft, NewsletterSchedule, NewsletterGenerationJob
 
 
 class NewsletterTemplateCreateSerializer(serializers.ModelSerializer):
@@ -36,4 +36,10 @@ class NewsletterDraftListDisplaySerializer(serializers.ModelSerializer):
 class NewsletterScheduleCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsletterSchedule
-        fields = ['pk', 'draft', 'start_time', 'frequency']
\ No newline at end of file
+        fields = ['pk', 'draft', 'start_time', 'frequency']
+
+
+class NewsletterGenerationJobDisplaySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NewsletterGenerationJob
+        fields = ['pk', 'status', 'html_content', 'error_message', 'created', 'started_at', 'finished_at']
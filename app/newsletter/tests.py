@@ -1,3 +1,198 @@
-from django.test import TestCase
+import json
+from string import Template
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from app.newsletter.html_template import CompiledTemplate, get_compiled_template, inline_css, minify_html
+from app.newsletter.llm_json import (
+    IncrementalNewsletterParser, is_complete_newsletter, parse_newsletter_json, validate_section,
+)
+from app.newsletter.relevance_ranker import RelevanceRanker, default_topic_quota
+
+
+def article(title, mentions, filler=20):
+    """Article mentioning the given words, mentions maps a word to how often it appears"""
+    words = [word for word, count in mentions.items() for _ in range(count)]
+    return {"title": title, "content": " ".join(words + ["filler"] * filler)}
+
+
+class RelevanceRankerTests(SimpleTestCase):
+
+    def setUp(self):
+        # Both topics appear in three articles, so their terms have the same weight
+        self.articles = [
+            article("a1", {"ai": 9}),
+            article("a2", {"ai": 8}),
+            article("a3", {"ai": 7}),
+            article("s1", {"security": 3}),
+            article("s2", {"security": 2}),
+            article("s3", {"security": 1}),
+            article("other", {"cooking": 5}),
+        ]
+
+    def titles(self, articles):
+        return [item["title"] for item in articles]
+
+    def test_without_quota_takes_the_best_scores(self):
+        ranked = RelevanceRanker(self.articles, ["AI", "Security"]).rank(3)
+
+        self.assertEqual(self.titles(ranked), ["a1", "a2", "a3"])
+
+    def test_quota_gives_every_topic_its_share(self):
+        ranked = RelevanceRanker(self.articles, ["AI", "Security"]).rank(4, per_topic_quota=2)
+
+        self.assertEqual(sorted(self.titles(ranked)), ["a1", "a2", "s1", "s2"])
+
+    def test_slots_left_by_a_topic_go_to_the_best_remaining(self):
+        # Only one security article, the third slot goes to the next best ai article
+        articles = self.articles[:4]
+        ranked = RelevanceRanker(articles, ["AI", "Security"]).rank(3, per_topic_quota=1)
+
+        self.assertEqual(sorted(self.titles(ranked)), ["a1", "a2", "s1"])
+
+    def test_result_is_in_score_order(self):
+        ranker = RelevanceRanker(self.articles, ["AI", "Security"])
+        ranked = ranker.rank(4, per_topic_quota=2)
+
+        scores = [ranker.scores[self.articles.index(item)].sum() for item in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_equal_scores_keep_the_original_order(self):
+        articles = [article(f"same{index}", {"ai": 1}) for index in range(4)]
+
+        self.assertEqual(self.titles(RelevanceRanker(articles, ["AI"]).rank(3)), ["same0", "same1", "same2"])
+
+    def test_no_articles_or_topics(self):
+        self.assertEqual(RelevanceRanker([], ["AI"]).rank(3), [])
+        self.assertEqual(len(RelevanceRanker(self.articles, []).rank(3)), 3)
+
+    def test_default_topic_quota(self):
+        self.assertEqual(default_topic_quota(3, ["AI", "Security"]), 2)
+        self.assertEqual(default_topic_quota(3, []), 3)
+        self.assertEqual(default_topic_quota(1, ["a", "b", "c"]), 1)
+
+
+NEWSLETTER = {
+    "intro": " Welcome to this week's issue. ",
+    "curated_links": [
+        {"title": "First", "summary": "One", "source": "A", "link": "https://a.com/1"},
+        {"title": "Second", "summary": "Two", "source": "B", "link": "https://b.com/2"},
+    ],
+    "summaries": [{"topic": "AI", "blurb": "Models got {bigger}."}],
+    "commentary": "Quotes \"and\" braces } survive.",
+    "trends": [{"title": "Agents", "explainer": "Everywhere", "link": "https://c.com/3"}],
+}
+
+
+class NewsletterJsonTests(SimpleTestCase):
+
+    def setUp(self):
+        self.content = json.dumps(NEWSLETTER)
+
+    def test_well_formed_output(self):
+        sections = parse_newsletter_json(self.content)
+
+        self.assertEqual(sections["intro"], "Welcome to this week's issue.")
+        self.assertEqual(sections["curated_links"], NEWSLETTER["curated_links"])
+        self.assertTrue(is_complete_newsletter(sections))
+
+    def test_fenced_output(self):
+        self.assertEqual(parse_newsletter_json(f"```json\n{self.content}\n```"), parse_newsletter_json(self.content))
+
+    def test_preamble_with_a_brace(self):
+        content = f"Here is {{the}} newsletter you asked for:\n{self.content}\nLet me know if you need changes."
+
+        self.assertEqual(parse_newsletter_json(content), parse_newsletter_json(self.content))
+
+    def test_truncated_output_keeps_the_complete_items(self):
+        cut = self.content.index('{"title": "Second"') + 20
+
+        sections = parse_newsletter_json(self.content[:cut])
+
+        self.assertEqual(sections["intro"], "Welcome to this week's issue.")
+        self.assertEqual([item["title"] for item in sections["curated_links"]], ["First"])
+        self.assertFalse(is_complete_newsletter(sections))
+
+    def test_finish_reports_the_salvaged_section(self):
+        parser = IncrementalNewsletterParser()
+        parser.feed(self.content[:self.content.index('{"title": "Second"') + 20])
+
+        sections, salvaged = parser.finish()
+
+        self.assertEqual(salvaged, [("curated_links", [NEWSLETTER["curated_links"][0]])])
+        self.assertEqual(sorted(sections), ["curated_links", "intro"])
+
+    def test_streamed_sections_arrive_as_they_complete(self):
+        parser = IncrementalNewsletterParser()
+        arrivals = []
+        for position, char in enumerate(f"```json\n{self.content}\n```"):
+            arrivals.extend((position, name) for name, _ in parser.feed(char))
+
+        self.assertEqual([name for _, name in arrivals], list(NEWSLETTER))
+        # The intro is available long before the end of the output
+        self.assertLess(arrivals[0][0], len(self.content) // 4)
+        self.assertEqual(parser.finish(), (parse_newsletter_json(self.content), []))
+
+    def test_missing_fields_are_left_out(self):
+        value = validate_section("curated_links", [{"title": "Only a title", "link": None}])
+
+        self.assertEqual(value, [{"title": "Only a title"}])
+
+    def test_invalid_items_and_sections_are_dropped(self):
+        value = validate_section("curated_links", [{"summary": "No title"}, "text", {"title": "Kept"}])
+
+        self.assertEqual(value, [{"title": "Kept"}])
+        self.assertIsNone(validate_section("intro", ["not", "text"]))
+        self.assertIsNone(validate_section("unknown", "text"))
+
+    def test_nothing_recoverable(self):
+        self.assertEqual(parse_newsletter_json("Sorry, I can't help with that."), {})
+
+
+class CompiledTemplateTests(SimpleTestCase):
+
+    def test_renders_like_string_template(self):
+        # Braces, quotes and backslashes in the markup and the values are copied as they are
+        source = '<a href="${link}" style="a{b}">$title</a> {{literal}} \\n "quoted" ${summary}'
+        context = {"link": "https://a.com/?q={x}", "title": "It's $5 \\o/", "summary": "{0} %s"}
+
+        self.assertEqual(CompiledTemplate(source).render(context), Template(source).safe_substitute(context))
+
+    def test_dollar_escape(self):
+        self.assertEqual(CompiledTemplate("$$${price} and $$name").render({"price": 5}), "$5 and $name")
+
+    def test_defaults_then_empty_string(self):
+        template = CompiledTemplate("<a href='${link}'>${title}</a>", defaults={"link": "#"})
+
+        self.assertEqual(template.render({}), "<a href='#'></a>")
+        self.assertEqual(template.render({"link": "/x", "title": "X"}), "<a href='/x'>X</a>")
+
+    def test_values_are_converted_to_text(self):
+        self.assertEqual(CompiledTemplate("${count} ${missing}").render({"count": 3, "missing": None}), "3 None")
+
+    def test_render_many_concatenates_the_items(self):
+        template = CompiledTemplate("<li>${title}</li>")
+
+        self.assertEqual(template.render_many([{"title": "A"}, {"title": "B"}]), "<li>A</li><li>B</li>")
+        self.assertEqual(template.render_many([]), "")
+
+    def test_invalid_placeholder(self):
+        with self.assertRaises(ValueError):
+            CompiledTemplate("Price: $5")
+
+    def test_styles_are_inlined_and_minified_once(self):
+        source = "<html><head><style>p { color: red; }</style></head>\n  <body>\n    <p>${text}</p>\n  </body></html>"
+
+        template = CompiledTemplate(source, inline_styles=True, minify=True)
+
+        self.assertEqual(template.source, minify_html(inline_css(source)))
+        self.assertIn('<p style="color: red;">Hi</p>', template.render({"text": "Hi"}))
+
+    def test_compiled_templates_are_shared_per_options_and_defaults(self):
+        source = "<p>${link}</p>"
+
+        with_default = get_compiled_template(source, defaults={"link": "#"})
+
+        self.assertIs(get_compiled_template(source, defaults={"link": "#"}), with_default)
+        self.assertEqual(with_default.render({}), "<p>#</p>")
+        self.assertEqual(get_compiled_template(source).render({}), "<p></p>")
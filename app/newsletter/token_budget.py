@@ -0,0 +1,63 @@
+import math
+
+from django.conf import settings
+
+from app.newsletter.models import LLMCallLog
+
+
+def estimate_tokens(text):
+    """Rough token count of a text from its length, no tokenizer round-trip"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / settings.LLM_BUDGET['CHARS_PER_TOKEN'])
+
+
+def estimate_call_tokens(prompt):
+    """Tokens a call is expected to use, prompt and completion"""
+    return estimate_tokens(prompt) + settings.LLM_BUDGET['EXPECTED_COMPLETION_TOKENS']
+
+
+class PromptBudgetPlanner:
+    """
+    Packs the sections of a prompt into a token budget.
+    Text reserved up front always goes in, each item added with fit takes the longest of its
+    variants that still fits in what is left, so the items offered first keep the most detail.
+    """
+
+    def __init__(self, max_prompt_tokens=None):
+        self.max_prompt_tokens = max_prompt_tokens or settings.LLM_BUDGET['MAX_PROMPT_TOKENS']
+        self.used_tokens = 0
+
+    @property
+    def remaining_tokens(self):
+        return self.max_prompt_tokens - self.used_tokens
+
+    def reserve(self, text):
+        """Count text that goes in whatever the budget"""
+        self.used_tokens += estimate_tokens(text)
+
+    def fit(self, render, variants):
+        """
+        Render the item with each variant, longest first, and keep the first one that fits.
+        Returns None when even the last variant does not fit.
+        """
+        for variant in variants:
+            text = render(variant)
+            tokens = estimate_tokens(text)
+            if tokens <= self.remaining_tokens:
+                self.used_tokens += tokens
+                return text
+        return None
+
+
+def record_llm_call(user_id, model, prompt, usage=None, duration_ms=None):
+    """Log the estimated tokens of a call next to the counts reported by the provider, if any"""
+    return LLMCallLog.objects.create(
+        user_id=user_id,
+        model=model,
+        estimated_prompt_tokens=estimate_tokens(prompt),
+        estimated_completion_tokens=settings.LLM_BUDGET['EXPECTED_COMPLETION_TOKENS'],
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+        duration_ms=duration_ms,
+    )
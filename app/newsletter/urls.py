@@ -2,12 +2,19 @@ from django.urls import path
 
 from app.newsletter.views import GenerateNewsletterAPIView, GenerateTrendsAPIView, SendNewsletterAPIView, \
     NewsletterTemplateCreateAPIView, NewsletterDraftCreateAPIView, NewsletterDraftDetailAPIView, \
-    NewsletterDraftListAPIView, NewsLetterTemplateListFilterAPIview, NewsletterScheduleCreateAPIView
+    NewsletterDraftListAPIView, NewsLetterTemplateListFilterAPIview, NewsletterScheduleCreateAPIView, \
+    NewsletterGenerationJobCreateAPIView, NewsletterGenerationJobDetailAPIView, NewsletterGenerationStreamAPIView
 
 urlpatterns = [
     # Authentication
     path("generate", GenerateNewsletterAPIView.as_view(), name="generate-newsletter"),
 
+    path("generate/stream", NewsletterGenerationStreamAPIView.as_view(), name="generate-newsletter-stream"),
+
+    path("generate/job", NewsletterGenerationJobCreateAPIView.as_view(), name="generate-newsletter-job-create"),
+
+    path("generate/job/<int:pk>", NewsletterGenerationJobDetailAPIView.as_view(), name="generate-newsletter-job-detail"),
+
     path("generate-trends", GenerateTrendsAPIView.as_view(), name="generate-trends"),
 
     path("send-newsletter", SendNewsletterAPIView.as_view(), name="send-newsletter"),
@@ -1,10 +1,9 @@
+import json
 import logging
-import os
-import time
 from datetime import datetime
 
-import resend
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from dotenv import load_dotenv
 from drf_yasg import openapi
@@ -14,17 +13,16 @@ from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from app.core.views import CustomPageNumberPagination
-from app.global_constants import SourceTypeConstants, SuccessMessage, TopicConstants, ErrorMessage
-from app.mail.models import EmailLog
-from app.newsletter.ai_curator import curate_newsletter
-from app.newsletter.email_sender import newsletter_to_html
-from app.newsletter.models import NewsletterTemplate, NewsletterDraft
+from app.global_constants import SuccessMessage, ErrorMessage
+from app.mail.outbox import enqueue_email
+from app.mail.serializers import OutboundEmailDisplaySerializer
+from app.newsletter.job_runner import submit_generation_job, fail_stale_jobs
+from app.newsletter.models import NewsletterTemplate, NewsletterDraft, NewsletterGenerationJob
+from app.newsletter.newsletter_utils import generate_newsletter_html, iter_newsletter_generation
 from app.newsletter.serializers import NewsletterTemplateCreateSerializer, NewsletterDraftCreateSerializer, \
     NewsletterDraftDisplaySerializer, NewsletterDraftListDisplaySerializer, NewsletterTemplateDisplaySerializer, \
-    NewsletterScheduleCreateSerializer
-from app.scrape.scrape_utils import scrape_api_source, scrape_reddit_source, scrape_arxiv_source, scrape_rss_source, \
-    get_trends_to_watch
-from app.source.models import Source
+    NewsletterScheduleCreateSerializer, NewsletterGenerationJobDisplaySerializer
+from app.scrape.scrape_cache import get_topic_trends
 from app.topic.models import UserTopic
 from app.utils import get_response_schema
 from permissions import IsUser
@@ -40,66 +38,60 @@ class GenerateNewsletterAPIView(GenericAPIView):
 
     def post(self, request):
 
-        user_topic_queryset = UserTopic.objects.select_related("topic") \
-            .filter(user_id=request.user.id)
+        html_content = generate_newsletter_html(request.user.id)
 
-        user_topic_list = [
-            {"topic_id": ut.topic.id, "topic_name": ut.topic.name}
-            for ut in user_topic_queryset
-        ]
+        return get_response_schema(html_content, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
-        topics = []
-        articles = []
-        top_trends = []
 
-        for item in user_topic_list:
+class NewsletterGenerationStreamAPIView(GenericAPIView):
+    """Generate a newsletter, streaming the progress as server-sent events"""
 
-            topics.append(item['topic_name'])
+    permission_classes = [IsUser]
 
-            # fetch urls and source_type
-            url_source_type = list(
-                Source.objects.filter(topic_id=item["topic_id"], is_active=True).values_list("url", "source_type"))
+    def post(self, request):
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
+        def event_stream():
+            for event, data in iter_newsletter_generation(request.user.id):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-            # scrape the news
-            for url, source_type in url_source_type:
+        response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Keep nginx from buffering the events
+        return response
 
-                if source_type == SourceTypeConstants.API.value:
-                    articles.extend(scrape_api_source(url, headers))
-                elif source_type == SourceTypeConstants.REDDIT.value:
-                    articles.extend(scrape_reddit_source(url, headers))
-                elif source_type == SourceTypeConstants.ARXIV.value:
-                    articles.extend(scrape_arxiv_source(url, headers))
-                elif source_type == SourceTypeConstants.RSS.value:
-                    articles.extend(scrape_rss_source(url))
 
-            # scrape the top trends
-            if item["topic_id"] == TopicConstants.AI.value:
+class NewsletterGenerationJobCreateAPIView(GenericAPIView):
+    """Submit a newsletter generation to the background workers, returns the job to poll"""
 
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/7509269760615483402"
+    permission_classes = [IsUser]
 
-            elif item["topic_id"] == TopicConstants.BLOCKCHAIN.value:
+    def post(self, request):
 
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/6397280906166700581"
+        job = submit_generation_job(request.user.id)
 
-            elif item["topic_id"] == TopicConstants.CYBERSECURITY.value:
+        serializer = NewsletterGenerationJobDisplaySerializer(job)
+        return get_response_schema(serializer.data, SuccessMessage.RECORD_CREATED.value, status.HTTP_202_ACCEPTED)
 
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/1739904053101697444"
 
-            elif item["topic_id"] == TopicConstants.IOT.value:
+class NewsletterGenerationJobDetailAPIView(GenericAPIView):
+    """Status of a newsletter generation job, the HTML is included once it succeeded"""
 
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/5112460639121574802"
+    permission_classes = [IsUser]
 
-            top_trends.extend(get_trends_to_watch(RSS_URL))
+    def get_object(self, request, pk):
+        return NewsletterGenerationJob.objects.filter(pk=pk, user_id=request.user.id, is_active=True).first()
 
-        newsletter_content = curate_newsletter(articles, topics, top_trends, user_id=request.user.id)
+    def get(self, request, pk):
 
-        html_content = newsletter_to_html(newsletter_content)
+        # A job lost with a crashed worker is failed instead of being polled forever
+        fail_stale_jobs(NewsletterGenerationJob.objects.filter(pk=pk, user_id=request.user.id))
 
-        return get_response_schema(html_content, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+        job = self.get_object(request, pk)
+        if not job:
+            return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+        serializer = NewsletterGenerationJobDisplaySerializer(job)
+        return get_response_schema(serializer.data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
 
 class GenerateTrendsAPIView(GenericAPIView):
@@ -114,26 +106,7 @@ class GenerateTrendsAPIView(GenericAPIView):
             for ut in user_topic_queryset
         ]
 
-        top_trends = []
-        for item in user_topic_list:
-
-            if item["topic_id"] == TopicConstants.AI.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/7509269760615483402"
-
-            elif item["topic_id"] == TopicConstants.BLOCKCHAIN.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/6397280906166700581"
-
-            elif item["topic_id"] == TopicConstants.CYBERSECURITY.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/1739904053101697444"
-
-            elif item["topic_id"] == TopicConstants.IOT.value:
-
-                RSS_URL = "https://www.google.com/alerts/feeds/05623958380462213229/5112460639121574802"
-
-            top_trends.extend(get_trends_to_watch(RSS_URL))
+        top_trends = get_topic_trends([item["topic_id"] for item in user_topic_list])
 
         return get_response_schema(top_trends, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
@@ -156,46 +129,17 @@ class SendNewsletterAPIView(GenericAPIView):
         html_content = request.data.get("html_content")
         recipient = request.data.get("recipient")
 
+        if html_content is None:
+            return get_response_schema({}, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
+
         if recipient is None:
             recipient = request.user.email
 
-        retries = 3
-        for attempt in range(1, retries + 1):
-            try:
-                resend.api_key = os.getenv("RESEND_API_KEY")
-                r = resend.Emails.send({
-                    "from": "onboarding@resend.dev",
-                    "to": recipient,
-                    "subject": "Daily Newsletter",
-                    "html": html_content
-                })
-
-                # Create DB log
-                with transaction.atomic():
-                    EmailLog.objects.create(
-                        user_id=request.user.id,
-                        recipient=recipient,
-                        message=html_content,
-                        status='SUCCESS'
-                    )
-
-                logger.info(f"[{datetime.now()}] Email sent successfully to {recipient}")
-                return get_response_schema(None, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
-
-            except Exception as e:
-                logger.error(f"Attempt {attempt} failed: {str(e)}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-
-        # If all retries failed
-        EmailLog.objects.create(
-            user_id=request.user.id,
-            message=html_content,
-            recipient="abhiroop1998.dev@gmail.com",
-            status='FAILED',
-            error_message=str(e)
-        )
-        logger.error(f"[{datetime.now()}] Email sending failed after retries.")
-        return get_response_schema({}, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
+        # The outbox workers send it and retry failures, the request does not wait for the provider
+        outbound_email = enqueue_email(request.user.id, recipient, "Daily Newsletter", html_content)
+
+        serializer = OutboundEmailDisplaySerializer(outbound_email)
+        return get_response_schema(serializer.data, SuccessMessage.RECORD_CREATED.value, status.HTTP_202_ACCEPTED)
 
 
 class NewsletterTemplateCreateAPIView(GenericAPIView):
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from app.sample.models import UserStyleSample
+from app.sample.sample_utils import rebuild_style_excerpts
+
+
+class Command(BaseCommand):
+    help = "Recompute the style excerpts of every style sample, eg after samples were imported outside the sample views"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only the samples of this user id")
+
+    def handle(self, *args, **options):
+        samples = UserStyleSample.objects.order_by("pk")
+        if options["user"]:
+            samples = samples.filter(user_id=options["user"])
+
+        count = 0
+        for sample in samples.iterator():
+            rebuild_style_excerpts(sample)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the style excerpts of {count} samples"))
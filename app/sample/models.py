@@ -21,5 +21,27 @@ class UserStyleSample(models.Model):
     is_active = models.BooleanField(default=True)
 
 
+class StyleExcerpt(models.Model):
+    """
+    Paragraph of a style sample long enough to be used as a style example, precomputed whenever
+    the sample is created, updated or deleted so generation only has to pick a few of them.
+    """
+
+    # Foreignkey
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='style_excerpts', related_query_name='style_excerpt')
+    sample = models.ForeignKey(UserStyleSample, on_delete=models.CASCADE, related_name='excerpts', related_query_name='excerpt')
+
+    # Field Declarations
+    text = models.TextField()
+    position = models.PositiveIntegerField(default=0)
 
+    # Addtional Fields
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Excerpts picked for a user's generation
+            models.Index(fields=['user', 'is_active'], name='style_excerpt_user_active_idx'),
+        ]
@@ -1,20 +1,82 @@
+import hashlib
 import random
 
-from app.sample.models import UserStyleSample
+from django.db import transaction
+from django.utils import timezone
+
+from app.sample.models import UserStyleSample, StyleExcerpt
+
+# Shorter paragraphs carry too little of the writing style to be used as examples
+MIN_EXCERPT_LENGTH = 100
+
+DEFAULT_STYLE_EXAMPLES = [
+    "Tone: warm, professional, concise. Style: clear summaries, actionable insights, and friendly editorial flow."
+]
+
+
+def split_style_excerpts(text):
+    """Paragraphs of a sample long enough to be used as style examples"""
+    return [p.strip() for p in text.split("\n") if len(p.strip()) > MIN_EXCERPT_LENGTH]
+
+
+def rebuild_style_excerpts(sample):
+    """Replace the stored excerpts of a sample, a sample that is no longer active keeps none"""
+    with transaction.atomic():
+        StyleExcerpt.objects.filter(sample=sample).delete()
+
+        if not sample.is_active:
+            return
+
+        StyleExcerpt.objects.bulk_create([
+            StyleExcerpt(user_id=sample.user_id, sample=sample, text=paragraph, position=position)
+            for position, paragraph in enumerate(split_style_excerpts(sample.text))
+        ])
 
 
 def style_examples_loader(user_id, max_samples=3, excerpt_length=250):
-    """Fetch 20 most recent style samples for a user and pick 2–3 excerpts."""
+    """
+    Pick 2–3 excerpts of the user's style samples from the precomputed excerpts.
+    The pick changes every day but is the same for the whole day, so identical inputs build identical
+    prompts and repeated generations can be served from the LLM cache.
+    """
+
+    excerpts = list(
+        StyleExcerpt.objects.filter(user_id=user_id, is_active=True)
+        .order_by("sample_id", "position").values_list("text", flat=True)
+    )
+
+    if not excerpts:
+        return DEFAULT_STYLE_EXAMPLES
+
+    return random.Random(timezone.now().date().isoformat()).sample(excerpts, min(max_samples, len(excerpts)))
+
+
+# Fingerprint of users without samples, they all get the default style
+DEFAULT_STYLE_FINGERPRINT = "default"
+
 
-    samples = UserStyleSample.objects.filter(user_id=user_id, is_active=True).order_by("-updated")
+def style_fingerprints(user_ids):
+    """
+    Fingerprint of the active style samples of each user, users with identical samples share a fingerprint.
+    Returns a dict of user id -> fingerprint.
+    """
+    samples_by_user = {}
+    sample_queryset = UserStyleSample.objects.filter(user_id__in=user_ids, is_active=True) \
+        .order_by("pk").values_list("user_id", "text")
+    for user_id, text in sample_queryset:
+        samples_by_user.setdefault(user_id, []).append(text)
 
-    if not samples:
-        return [
-            "Tone: warm, professional, concise. Style: clear summaries, actionable insights, and friendly editorial flow."
-        ]
+    fingerprints = {}
+    for user_id in user_ids:
+        texts = samples_by_user.get(user_id)
+        if not texts:
+            fingerprints[user_id] = DEFAULT_STYLE_FINGERPRINT
+            continue
 
-    all_text = " ".join([s.text for s in samples])
-    paragraphs = [p.strip() for p in all_text.split("\n") if len(p.strip()) > 100]
+        digest = hashlib.sha256()
+        for text in sorted(texts):
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\0")
+        fingerprints[user_id] = digest.hexdigest()
 
-    excerpts = random.sample(paragraphs, min(max_samples, len(paragraphs)))
-    return excerpts
+    return fingerprints
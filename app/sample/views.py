@@ -8,6 +8,7 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from app.core.views import CustomPageNumberPagination
 from app.global_constants import SuccessMessage, ErrorMessage
 from app.sample.models import UserStyleSample
+from app.sample.sample_utils import rebuild_style_excerpts
 from app.sample.serializers import UserStyleSampleCreateSerializer, UserStyleSampleDisplaySerializer, \
     UserStyleSampleUpdateSerializer
 from app.utils import get_response_schema
@@ -35,7 +36,8 @@ class UserStyleSampleCreateAPIView(GenericAPIView):
         serializer = UserStyleSampleCreateSerializer(data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            user_style_sample = serializer.save()
+            rebuild_style_excerpts(user_style_sample)
             return get_response_schema(serializer.data, SuccessMessage.RECORD_CREATED.value, status.HTTP_201_CREATED)
 
         return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
@@ -82,7 +84,8 @@ class UserStyleSampleDetailAPIView(GenericAPIView):
 
         serializer = UserStyleSampleUpdateSerializer(user_style_sample, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            user_style_sample = serializer.save()
+            rebuild_style_excerpts(user_style_sample)
             return get_response_schema(serializer.data, SuccessMessage.RECORD_UPDATED.value, status.HTTP_200_OK)
         return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
 
@@ -94,6 +97,7 @@ class UserStyleSampleDetailAPIView(GenericAPIView):
 
         user_style_sample.is_active = False
         user_style_sample.save()
+        rebuild_style_excerpts(user_style_sample)
 
         return get_response_schema({}, SuccessMessage.RECORD_DELETED.value, status.HTTP_204_NO_CONTENT)
 
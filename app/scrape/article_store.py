@@ -0,0 +1,143 @@
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from app.scrape.models import Article
+from app.scrape.near_duplicates import article_signature, signature_to_bytes
+
+# Query parameters that only track the referrer and never change the page
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src'}
+
+
+def normalize_url(url):
+    """Normalize an article url so the same story reached from different sources maps to one key"""
+    parts = urlsplit(url.strip())
+
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+
+    path = parts.path.rstrip("/") or "/"
+
+    # Drop the fragment, it never changes the article
+    return urlunsplit((parts.scheme.lower() or "https", host, path, urlencode(query), ""))
+
+
+def content_hash(title, content):
+    """Hash of the whitespace and case normalized title and content"""
+    text = re.sub(r"\s+", " ", f"{title} {content}").strip().lower()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _parse_published(value):
+    if not value:
+        return None
+
+    try:
+        published = parse_datetime(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+
+    if published and timezone.is_aware(published) and not settings.USE_TZ:
+        published = timezone.make_naive(published)
+
+    return published
+
+
+def article_to_dict(article):
+    """Article row to the dict shape returned by the scrapers, with its stored MinHash signature"""
+    return {
+        'source': article.url,
+        'title': article.title,
+        'content': article.content,
+        'published': article.published.isoformat() if article.published else None,
+        'minhash': bytes(article.minhash) if article.minhash is not None else None,
+    }
+
+
+def dedupe_articles(articles):
+    """Keep the first article of every normalized url and content hash, order is preserved"""
+    seen_urls = set()
+    seen_hashes = set()
+    unique_articles = []
+
+    for article in articles:
+        url = normalize_url(article['source']) if article.get('source') else ""
+        digest = content_hash(article.get('title', ''), article.get('content', ''))
+
+        if (url and url in seen_urls) or digest in seen_hashes:
+            continue
+
+        seen_urls.add(url)
+        seen_hashes.add(digest)
+        unique_articles.append(article)
+
+    return unique_articles
+
+
+def store_articles(source_id, articles):
+    """
+    Upsert the scraped articles of a source in bulk.
+    Articles whose content is already stored under another url are not stored again, they are still returned
+    as the other url may belong to a source of another topic. Returns the articles of the source once deduplicated,
+    articles without an url are returned but not stored.
+    """
+    rows = {}
+    unstored = []
+    for article in dedupe_articles(articles):
+        if not article.get('source'):
+            unstored.append(article)
+            continue
+
+        url = normalize_url(article['source'])
+        rows[url] = Article(
+            source_id=source_id,
+            url=url,
+            title=article.get('title', '')[:500],
+            content=article.get('content', ''),
+            published=_parse_published(article.get('published')),
+            content_hash=content_hash(article.get('title', ''), article.get('content', '')),
+            minhash=signature_to_bytes(article_signature(article.get('title', ''), article.get('content', ''))),
+        )
+
+    if not rows:
+        return unstored
+
+    # Same story stored from another source under a different url
+    known_hashes = set(
+        Article.objects.filter(content_hash__in=[row.content_hash for row in rows.values()])
+        .exclude(url__in=rows.keys())
+        .values_list("content_hash", flat=True))
+
+    rows = list(rows.values())
+
+    Article.objects.bulk_create(
+        [row for row in rows if row.content_hash not in known_hashes],
+        update_conflicts=True,
+        unique_fields=['url'],
+        update_fields=['source', 'title', 'content', 'published', 'content_hash', 'minhash', 'updated',
+                       'is_active'],
+    )
+
+    return [article_to_dict(row) for row in rows] + unstored
+
+
+def get_recent_articles(source_ids, since):
+    """Articles stored for the sources since the given time, grouped by source id"""
+    article_queryset = Article.objects.filter(source_id__in=source_ids, updated__gte=since, is_active=True) \
+        .order_by("source_id", "id")
+
+    grouped = {}
+    for article in article_queryset:
+        grouped.setdefault(article.source_id, []).append(article_to_dict(article))
+
+    return grouped
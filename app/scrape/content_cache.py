@@ -0,0 +1,122 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from app.scrape.article_store import normalize_url
+
+
+class LRUCache:
+    """Thread safe in-process LRU cache with a TTL per entry"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            # Evict the least recently used entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ArticleContentCache:
+    """
+    Two tier cache of extracted article text keyed by normalized url.
+    The in-process LRU is checked first, then the file backed 'article_content' cache shared by processes.
+    """
+
+    def __init__(self):
+        config = settings.ARTICLE_CONTENT_CACHE
+        self.memory = LRUCache(config['MEMORY_MAX_ENTRIES'], config['TTL'])
+        self.ttl = config['TTL']
+
+        self._counters = {'memory_hits': 0, 'store_hits': 0, 'misses': 0}
+        self._counters_lock = threading.Lock()
+
+    @property
+    def store(self):
+        return caches['article_content']
+
+    @staticmethod
+    def key(url):
+        return f"article:content:{hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()}"
+
+    def _count(self, counter):
+        with self._counters_lock:
+            self._counters[counter] += 1
+
+    def get(self, url):
+        key = self.key(url)
+
+        content = self.memory.get(key)
+        if content is not None:
+            self._count('memory_hits')
+            return content
+
+        content = self.store.get(key)
+        if content is not None:
+            self._count('store_hits')
+            self.memory.set(key, content)
+            return content
+
+        self._count('misses')
+        return None
+
+    def set(self, url, content):
+        key = self.key(url)
+        self.memory.set(key, content)
+        self.store.set(key, content, self.ttl)
+
+    def discard(self, urls):
+        """Drop the content of the urls from both tiers"""
+        keys = [self.key(url) for url in urls]
+        for key in keys:
+            self.memory.delete(key)
+        self.store.delete_many(keys)
+
+    def stats(self):
+        """Hit and miss counters since the process started"""
+        with self._counters_lock:
+            stats = dict(self._counters)
+
+        lookups = stats['memory_hits'] + stats['store_hits'] + stats['misses']
+        stats['hit_ratio'] = (stats['memory_hits'] + stats['store_hits']) / lookups if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+
+article_content_cache = ArticleContentCache()
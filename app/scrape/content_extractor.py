@@ -0,0 +1,275 @@
+from html.parser import HTMLParser
+
+# Candidate containers in priority order, the first one holding enough text wins.
+# Each entry is (tag, class), None matches anything.
+CONTENT_CONTAINERS = [
+    # News site specific containers
+    (None, 'article-body'),
+    (None, 'story-body'),
+    (None, 'article-content'),
+    (None, 'post-content'),
+    (None, 'entry-content'),
+    (None, 'content'),
+    (None, 'story'),
+    (None, 'article'),
+    ('article', None),
+    ('main', None),
+    (None, 'main'),
+]
+
+# Bucket of paragraphs found anywhere in the document, tried last
+GENERIC_BUCKET = len(CONTENT_CONTAINERS)
+
+CONTAINERS_BY_CLASS = {}
+CONTAINERS_BY_TAG = {}
+for _index, (_tag, _class) in enumerate(CONTENT_CONTAINERS):
+    if _class is not None:
+        CONTAINERS_BY_CLASS.setdefault(_class, []).append(_index)
+    else:
+        CONTAINERS_BY_TAG.setdefault(_tag, []).append(_index)
+
+MAX_PARAGRAPHS = 5  # First 5 paragraphs of a container for better context
+MIN_PARAGRAPH_LENGTH = 50
+MIN_CONTENT_LENGTH = 200
+MIN_DESCRIPTION_LENGTH = 100
+MAX_FALLBACK_LINES = 3
+
+# Elements that never have children
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+}
+
+# Elements whose start implicitly closes an open paragraph
+PARAGRAPH_CLOSERS = {
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'main', 'menu', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'ul',
+}
+
+# Elements whose text is never article content
+SKIPPED_ELEMENTS = {'script', 'style', 'noscript', 'template'}
+
+
+class ContentExtractor(HTMLParser):
+    """
+    Extracts the main text of an article page in a single pass over the markup.
+
+    While walking the document it keeps count of the candidate containers that are open and files
+    every paragraph into the bucket of each one, so all candidates are scored in the same pass
+    instead of running one CSS query per candidate over the whole tree.
+    The meta description and the plain text fallback are collected in the same pass.
+    Markup can be fed in chunks while it downloads, see has_enough_text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+        # Open elements as (tag, candidate indices opened by the element)
+        self._stack = []
+        self._open_containers = [0] * len(CONTENT_CONTAINERS)
+        self._buckets = [[] for _ in range(len(CONTENT_CONTAINERS) + 1)]
+
+        # Paragraph being read, its text parts and the buckets it is filed into.
+        # A text node can arrive in several pieces when the markup is fed in chunks, it is stripped once complete
+        self._paragraph_parts = None
+        self._paragraph_buckets = None
+        self._text_node = []
+
+        self._skip_depth = 0
+        self.description = None
+
+        # Plain text fallback, first substantial lines of the document text
+        self._text_length = 0
+        self._line_buffer = ""
+        self._fallback_lines = []
+
+    # Parser callbacks
+
+    def handle_starttag(self, tag, attrs):
+        self._end_text_node()
+        if tag in PARAGRAPH_CLOSERS and self._paragraph_parts is not None:
+            self._close_paragraph()
+            self._pop_to('p')
+
+        if tag == 'meta':
+            self._handle_meta(attrs)
+
+        if tag in VOID_ELEMENTS:
+            return
+
+        if tag in SKIPPED_ELEMENTS:
+            self._skip_depth += 1
+
+        opened = list(CONTAINERS_BY_TAG.get(tag, ()))
+        for name, value in attrs:
+            if name == 'class' and value:
+                for class_name in value.split():
+                    opened.extend(CONTAINERS_BY_CLASS.get(class_name, ()))
+
+        if tag == 'p':
+            self._open_paragraph()
+
+        # A container's classes apply to its descendants only, so they are counted after the paragraph check
+        for index in opened:
+            self._open_containers[index] += 1
+        self._stack.append((tag, opened))
+
+    def handle_startendtag(self, tag, attrs):
+        self._end_text_node()
+        if tag == 'meta':
+            self._handle_meta(attrs)
+
+    def handle_endtag(self, tag):
+        self._end_text_node()
+        if tag == 'p' and self._paragraph_parts is not None:
+            self._close_paragraph()
+
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+
+        if self._paragraph_parts is not None:
+            self._text_node.append(data)
+
+        self._collect_fallback_text(data)
+
+    def handle_comment(self, data):
+        self._end_text_node()
+
+    # Internal helpers
+
+    def _handle_meta(self, attrs):
+        if self.description is not None:
+            return
+
+        attrs = dict(attrs)
+        if attrs.get('name') == 'description' and attrs.get('content'):
+            self.description = attrs['content'].strip()
+
+    def _pop_to(self, tag):
+        """Close the element and everything opened inside it, ignore stray end tags"""
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+
+        while self._stack:
+            open_tag, opened = self._stack.pop()
+            for index in opened:
+                self._open_containers[index] -= 1
+            if open_tag in SKIPPED_ELEMENTS:
+                self._skip_depth -= 1
+            if open_tag == tag:
+                break
+
+    def _open_paragraph(self):
+        buckets = [
+            index for index, count in enumerate(self._open_containers)
+            if count and len(self._buckets[index]) < MAX_PARAGRAPHS
+        ]
+        if len(self._buckets[GENERIC_BUCKET]) < MAX_PARAGRAPHS:
+            buckets.append(GENERIC_BUCKET)
+
+        self._paragraph_parts = []
+        self._paragraph_buckets = buckets
+
+    def _end_text_node(self):
+        if not self._text_node:
+            return
+
+        stripped = "".join(self._text_node).strip()
+        if stripped:
+            self._paragraph_parts.append(stripped)
+        self._text_node = []
+
+    def _close_paragraph(self):
+        self._end_text_node()
+        text = "".join(self._paragraph_parts)
+        for index in self._paragraph_buckets:
+            self._buckets[index].append(text)
+
+        self._paragraph_parts = None
+        self._paragraph_buckets = None
+
+    def _collect_fallback_text(self, data):
+        self._text_length += len(data)
+        if len(self._fallback_lines) >= MAX_FALLBACK_LINES:
+            return
+
+        self._line_buffer += data
+        if "\n" not in self._line_buffer:
+            return
+
+        *lines, self._line_buffer = self._line_buffer.split("\n")
+        for line in lines:
+            self._add_fallback_line(line)
+
+    def _add_fallback_line(self, line):
+        line = line.strip()
+        if len(line) > MIN_PARAGRAPH_LENGTH and len(self._fallback_lines) < MAX_FALLBACK_LINES:
+            self._fallback_lines.append(line)
+
+    @staticmethod
+    def _bucket_text(paragraphs):
+        """Joined text of the long paragraphs of a bucket, None when not enough for an article"""
+        content_parts = [text for text in paragraphs if len(text) > MIN_PARAGRAPH_LENGTH]
+        if content_parts and len(' '.join(content_parts)) > MIN_CONTENT_LENGTH:
+            return ' '.join(content_parts)
+        return None
+
+    # Results
+
+    def best_paragraphs(self):
+        """Text of the highest priority candidate container with enough content, None if there is none"""
+        for paragraphs in self._buckets:
+            text = self._bucket_text(paragraphs)
+            if text:
+                return text
+        return None
+
+    def has_enough_text(self):
+        """
+        True once the text of the best candidate container so far is settled, feeding can stop at that point.
+
+        That is the highest priority container with enough text, once it holds MAX_PARAGRAPHS paragraphs
+        while every higher priority container does too, or once its element has closed. The latter is a heuristic:
+        a full parse could still prefer a higher priority container further down the page, or add the paragraphs
+        of a second element with the same class, but reading to the byte budget for that rare case would
+        download most pages in full.
+        """
+        all_final = True
+        for index, paragraphs in enumerate(self._buckets[:GENERIC_BUCKET]):
+            final = len(paragraphs) >= MAX_PARAGRAPHS
+            if self._bucket_text(paragraphs):
+                return (final and all_final) or not self._open_containers[index]
+            all_final = all_final and final
+        return False
+
+    def result(self):
+        """Close the parser and return the extracted text, empty string when nothing usable was found"""
+        self.close()
+        if self._paragraph_parts is not None:
+            self._close_paragraph()
+
+        text = self.best_paragraphs()
+        if text:
+            return text
+
+        # Meta description as fallback
+        if self.description and len(self.description) > MIN_DESCRIPTION_LENGTH:
+            return self.description
+
+        # Final fallback: first substantial lines of the document text
+        self._add_fallback_line(self._line_buffer)
+        self._line_buffer = ""
+        if self._text_length > MIN_DESCRIPTION_LENGTH and self._fallback_lines:
+            return ' '.join(self._fallback_lines)
+
+        return ""
+
+
+def extract_article_text(html):
+    """Extract the main text of an article page, empty string when nothing usable was found"""
+    extractor = ContentExtractor()
+    extractor.feed(html)
+    return extractor.result()
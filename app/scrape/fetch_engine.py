@@ -0,0 +1,135 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from app.global_constants import SourceTypeConstants
+from app.scrape.content_cache import article_content_cache
+from app.scrape.scrape_utils import list_api_source, list_reddit_source, list_arxiv_source, list_rss_source, \
+    get_article_content_safe, build_article, get_trends_to_watch
+
+# Listing function per source type, each returns article stubs
+SOURCE_LISTERS = {
+    SourceTypeConstants.API.value: list_api_source,
+    SourceTypeConstants.REDDIT.value: list_reddit_source,
+    SourceTypeConstants.ARXIV.value: list_arxiv_source,
+    SourceTypeConstants.RSS.value: list_rss_source,
+}
+
+
+class FetchEngine:
+    """
+    Fetches the listings and article bodies of a set of sources concurrently.
+
+    The blocking fetches run on a thread pool driven by asyncio. A global semaphore bounds
+    the number of requests in flight and a per-host semaphore keeps one site from being hammered,
+    so a run takes roughly as long as its slowest chain of fetches instead of their sum.
+    """
+
+    def __init__(self, max_concurrency=None, per_host_concurrency=None):
+        self.max_concurrency = max_concurrency or settings.SCRAPE_ENGINE['MAX_CONCURRENCY']
+        self.per_host_concurrency = per_host_concurrency or settings.SCRAPE_ENGINE['PER_HOST_CONCURRENCY']
+
+        # Created per run, semaphores are bound to the running event loop
+        self._executor = None
+        self._semaphore = None
+        self._host_semaphores = {}
+
+    async def _fetch(self, url, func, *args):
+        """Run a blocking fetch on the pool once a host slot and a global slot are free"""
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+
+        # Take the host slot first so a task waiting on a busy host does not hold a global slot
+        async with self._host_semaphores[host]:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def _fetch_content(self, stub):
+        if stub.get('content') is not None:
+            return None
+        return await self._fetch(stub['source'], get_article_content_safe, stub['source'])
+
+    async def _scrape_source(self, url, source_type, headers, max_articles):
+        lister = SOURCE_LISTERS.get(source_type)
+        if lister is None:
+            return []
+
+        stubs = await self._fetch(url, lister, url, headers, max_articles)
+        contents = await asyncio.gather(*[self._fetch_content(stub) for stub in stubs])
+
+        articles = []
+        for stub, content in zip(stubs, contents):
+            article = build_article(stub, content)
+            if article:
+                articles.append(article)
+                print(f"   ✅ Found: {article['title'][:50]}...")
+
+        return articles[:max_articles]
+
+    async def _run(self, coroutines):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_semaphores = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            self._executor = executor
+            try:
+                return await asyncio.gather(*coroutines)
+            finally:
+                self._executor = None
+
+    def scrape(self, sources, headers=None, max_articles=5):
+        """
+        Scrape a list of (url, source_type) pairs.
+        Returns one list of article dicts per source, in the order given.
+        """
+        before = article_content_cache.stats()
+
+        results = asyncio.run(self._run([
+            self._scrape_source(url, source_type, headers, max_articles)
+            for url, source_type in sources
+        ]))
+
+        print(format_cache_stats(article_content_cache.stats(), before))
+        return results
+
+    def trends(self, rss_urls, top_n=5):
+        """Fetch several trend feeds, returns one list of trends per feed in the order given"""
+        return asyncio.run(self._run([
+            self._fetch(rss_url, get_trends_to_watch, rss_url, top_n)
+            for rss_url in rss_urls
+        ]))
+
+
+def format_cache_stats(stats, before):
+    """Article content cache lookups of a run, from the process wide counters before and after it"""
+    memory_hits = stats['memory_hits'] - before['memory_hits']
+    store_hits = stats['store_hits'] - before['store_hits']
+    misses = stats['misses'] - before['misses']
+    lookups = memory_hits + store_hits + misses
+    hit_ratio = (memory_hits + store_hits) / lookups if lookups else 0.0
+
+    return (
+        f"   📦 Article content cache: {memory_hits} memory hits, {store_hits} store hits, {misses} misses "
+        f"({hit_ratio:.0%} hit ratio, {stats['hit_ratio']:.0%} since start), {stats['memory_entries']} entries in memory"
+    )
+
+
+def scrape_sources(sources, headers=None, max_articles=5):
+    """Scrape a list of (url, source_type) pairs concurrently, returns a flat list of article dicts"""
+    articles = []
+    for source_articles in FetchEngine().scrape(sources, headers, max_articles):
+        articles.extend(source_articles)
+    return articles
+
+
+def fetch_trends(rss_urls, top_n=5):
+    """Fetch several trend feeds concurrently, returns a flat list of trends"""
+    trends = []
+    for feed_trends in FetchEngine().trends(rss_urls, top_n):
+        trends.extend(feed_trends)
+    return trends
@@ -0,0 +1,83 @@
+import hashlib
+import threading
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session():
+    """Create a session with keep-alive connection pools per host and the shared User-Agent"""
+    config = settings.SCRAPE_HTTP
+
+    adapter = HTTPAdapter(
+        pool_connections=config['POOL_CONNECTIONS'],  # number of hosts to keep pools for
+        pool_maxsize=config['POOL_MAXSIZE'],  # connections kept alive per host
+        max_retries=config['MAX_RETRIES'],
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': config['USER_AGENT']})
+
+    return session
+
+
+def get_session():
+    """Return the process wide session, repeat fetches to the same host reuse its connections"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+
+    return _session
+
+
+def http_get(url, headers=None, timeout=None, **kwargs):
+    """GET through the shared session, headers are merged over the session defaults"""
+    if timeout is None:
+        timeout = settings.SCRAPE_HTTP['TIMEOUT']
+
+    return get_session().get(url, headers=headers, timeout=timeout, **kwargs)
+
+
+def conditional_get(url, parse, headers=None, **kwargs):
+    """
+    GET that sends the ETag / Last-Modified validators of the previous response of the url.
+
+    parse(response) turns a 200 response into the result, which is stored next to the validators.
+    A 304 response returns the stored result without downloading or parsing the payload again.
+    """
+    cache = caches['http']
+    key = f"http:conditional:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+    entry = cache.get(key)
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry['etag']:
+            request_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+    response = http_get(url, headers=request_headers, **kwargs)
+
+    if response.status_code == 304 and entry:
+        cache.touch(key)
+        return entry['parsed']
+
+    response.raise_for_status()
+    parsed = parse(response)
+
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        cache.set(key, {'etag': etag, 'last_modified': last_modified, 'parsed': parsed})
+
+    return parsed
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from pathlib import Path
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from app.scrape.http_client import get_session
+
+HTTP_FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "http"
+MANIFEST_NAME = "manifest.json"
+
+
+def load_manifest(fixtures_dir=HTTP_FIXTURES_DIR):
+    """
+    Manifest of a fixture directory: the topics and sources it was recorded for and the recorded responses,
+    {"topics": [...], "sources": [[url, source_type], ...], "trends": [url, ...],
+     "responses": {url: {"status": 200, "content_type": "...", "file": "relative/path"}}}
+    """
+    with open(Path(fixtures_dir) / MANIFEST_NAME, encoding="utf-8") as manifest_file:
+        return json.load(manifest_file)
+
+
+def save_manifest(manifest, fixtures_dir=HTTP_FIXTURES_DIR):
+    Path(fixtures_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(fixtures_dir) / MANIFEST_NAME, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+
+
+def build_response(request, status, content_type, body):
+    response = Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict({"Content-Type": content_type, "Content-Length": str(len(body))})
+    # A file like raw body so streamed reads (iter_content) work as they do over the network
+    response.raw = io.BytesIO(body)
+    response.url = request.url
+    response.request = request
+    response.encoding = None
+    response.reason = "OK" if status == 200 else "Not Found"
+    return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves the responses recorded in a fixture directory instead of going to the network.
+    Urls without a fixture get a 404, latency adds a fixed delay per request to mimic a remote site.
+    """
+
+    def __init__(self, fixtures_dir=HTTP_FIXTURES_DIR, latency=0.0):
+        super().__init__()
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency = latency
+        self.responses = load_manifest(fixtures_dir)["responses"]
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def _body(self, path):
+        with self._lock:
+            if path not in self._bodies:
+                self._bodies[path] = (self.fixtures_dir / path).read_bytes()
+            return self._bodies[path]
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+
+        fixture = self.responses.get(request.url)
+        if fixture is None:
+            return build_response(request, 404, "text/plain", b"")
+
+        return build_response(request, fixture["status"], fixture["content_type"], self._body(fixture["file"]))
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Goes to the network and saves every response body in a fixture directory, see load_manifest"""
+
+    def __init__(self, fixtures_dir=HTTP_FIXTURES_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures_dir = Path(fixtures_dir)
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+
+        # Reading the body here leaves it on response.content, callers streaming it still get it all
+        body = response.content
+        name = f"responses/{hashlib.sha256(request.url.encode('utf-8')).hexdigest()[:16]}"
+        (self.fixtures_dir / "responses").mkdir(parents=True, exist_ok=True)
+        (self.fixtures_dir / name).write_bytes(body)
+
+        with self._lock:
+            self.responses[request.url] = {
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type", ""),
+                "file": name,
+            }
+
+        return response
+
+
+def install_adapter(adapter):
+    """Route every request of the shared scraping session through the adapter"""
+    session = get_session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
@@ -0,0 +1,114 @@
+import statistics
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from app.scrape.content_extractor import ContentExtractor, extract_article_text
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / "fixtures" / "html"
+STREAM_CHUNK_SIZE = 1024
+
+
+def selector_cascade_extract(html):
+    """The previous extractor, one CSS query per candidate selector over the whole document"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    content_selectors = [
+        '.article-body p', '.story-body p', '.article-content p', '.post-content p', '.entry-content p',
+        '.content p', '.story p', '.article p', 'article p', 'main p', '.main p', 'p'
+    ]
+
+    for selector in content_selectors:
+        paragraphs = soup.select(selector)
+        if paragraphs:
+            content_parts = []
+            for p in paragraphs[:5]:
+                text = p.get_text(strip=True)
+                if len(text) > 50:
+                    content_parts.append(text)
+
+            if content_parts and len(' '.join(content_parts)) > 200:
+                return ' '.join(content_parts)
+
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and meta_desc.get('content'):
+        desc = meta_desc.get('content').strip()
+        if len(desc) > 100:
+            return desc
+
+    text = soup.get_text()
+    if len(text) > 100:
+        lines = text.split('\n')
+        clean_lines = [line.strip() for line in lines if len(line.strip()) > 50]
+        if clean_lines:
+            return ' '.join(clean_lines[:3])
+
+    return ""
+
+
+def streamed_extract(html, chunk_size=STREAM_CHUNK_SIZE):
+    """The extractor fed in chunks like a download, stopping as soon as it has enough text"""
+    extractor = ContentExtractor()
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+        if extractor.has_enough_text():
+            break
+    return extractor.result()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the single pass article extractor against the selector cascade over saved HTML fixtures, "
+        "and check that streaming with early stop extracts the same text as a full parse"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Runs per fixture and extractor")
+        parser.add_argument("--fixtures", type=str, default=str(FIXTURES_DIR), help="Directory of .html fixtures")
+
+    def _time(self, func, html, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func(html)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        fixtures = sorted(Path(options["fixtures"]).glob("*.html"))
+
+        if not fixtures:
+            self.stderr.write(f"No .html fixtures found in {options['fixtures']}")
+            return
+
+        self.stdout.write(f"{'fixture':<24}{'size KB':>10}{'cascade ms':>14}{'single pass ms':>18}{'speedup':>10}  same  streamed")
+
+        total_cascade = total_single_pass = 0
+        all_streamed_same = True
+        for fixture in fixtures:
+            html = fixture.read_text(encoding="utf-8")
+
+            cascade_ms = self._time(selector_cascade_extract, html, iterations)
+            single_pass_ms = self._time(extract_article_text, html, iterations)
+            full = extract_article_text(html)
+            same = selector_cascade_extract(html) == full
+            streamed_same = streamed_extract(html) == full
+            all_streamed_same = all_streamed_same and streamed_same
+
+            total_cascade += cascade_ms
+            total_single_pass += single_pass_ms
+
+            self.stdout.write(
+                f"{fixture.stem:<24}{len(html) / 1024:>10.1f}{cascade_ms:>14.2f}{single_pass_ms:>18.2f}"
+                f"{cascade_ms / single_pass_ms:>9.1f}x  {'yes' if same else 'no':<6}{'yes' if streamed_same else 'no'}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Total median: cascade {total_cascade:.2f} ms, single pass {total_single_pass:.2f} ms, "
+            f"speedup {total_cascade / total_single_pass:.1f}x"
+        ))
+        if not all_streamed_same:
+            self.stderr.write("Streamed extraction differs from the full parse on some fixtures")
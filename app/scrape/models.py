@@ -1,3 +1,34 @@
 from django.db import models
 
+from app.source.models import Source
+
+
 # Create your models here.
+class Article(models.Model):
+    """Model to store a scraped article, one row per normalized url"""
+
+    # Foreign key declarations
+    source = models.ForeignKey(Source,
+                               on_delete=models.CASCADE,
+                               related_name="source_articles",
+                               related_query_name="source_article")
+
+    # Field declarations
+    url = models.URLField(max_length=2048, unique=True)
+    title = models.CharField(max_length=500)
+    content = models.TextField(blank=True)
+    published = models.DateTimeField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    # MinHash signature of the title and content, compared across days to find near-duplicate stories
+    minhash = models.BinaryField(null=True, blank=True)
+
+    # Additional Field declarations
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # Recent articles of a source
+            models.Index(fields=['source', 'updated'], name='article_source_updated_idx'),
+        ]
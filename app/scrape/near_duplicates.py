@@ -0,0 +1,185 @@
+import re
+import zlib
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from app.scrape.models import Article
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Mersenne prime of the permutation hashes, shingle hashes and coefficients stay below it
+# so a * x + b never overflows 64 bits
+MERSENNE_PRIME = (1 << 31) - 1
+SIGNATURE_DTYPE = np.dtype("<u4")
+MINHASH_SEED = 1
+SHINGLE_BASE = np.uint64(1000003)
+
+
+class MinHasher:
+    """
+    MinHash signatures of word shingles.
+    The permutations are seeded so signatures computed in different runs can be compared.
+    """
+
+    def __init__(self, num_perm=None, shingle_size=None):
+        self.num_perm = num_perm or settings.NEAR_DUPLICATES['NUM_PERM']
+        self.shingle_size = shingle_size or settings.NEAR_DUPLICATES['SHINGLE_SIZE']
+
+        generator = np.random.default_rng(MINHASH_SEED)
+        self._a = generator.integers(1, MERSENNE_PRIME, self.num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, MERSENNE_PRIME, self.num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        """Hashes of the overlapping word shingles of a text"""
+        words = WORD_PATTERN.findall(text.lower())
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+
+        # Hash every word once and combine the hashes of each window with a polynomial rolling hash
+        word_hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words),
+                                  dtype=np.uint64, count=len(words)) % MERSENNE_PRIME
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(size):
+            hashes = (hashes * SHINGLE_BASE + word_hashes[offset:offset + count]) % MERSENNE_PRIME
+
+        return np.unique(hashes)
+
+    def signature(self, text):
+        """MinHash signature of a text, None when it has no words"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+
+        # All permutations of all shingles at once, shape (num_perm, shingles)
+        permuted = (self._a[:, None] * shingles[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1).astype(SIGNATURE_DTYPE)
+
+
+class LSHIndex:
+    """
+    Locality sensitive index of MinHash signatures.
+    Signatures are cut in bands, two signatures sharing any band are candidates and are confirmed
+    by their estimated Jaccard similarity, so a lookup only compares the few signatures in its buckets.
+    """
+
+    def __init__(self, num_perm=None, bands=None, threshold=None):
+        self.num_perm = num_perm or settings.NEAR_DUPLICATES['NUM_PERM']
+        self.bands = bands or settings.NEAR_DUPLICATES['BANDS']
+        self.threshold = threshold or settings.NEAR_DUPLICATES['THRESHOLD']
+        self.rows = self.num_perm // self.bands
+
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, key, signature):
+        self._signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, signature):
+        """Key of the most similar indexed signature above the threshold, None if there is none"""
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        best_key, best_similarity = None, self.threshold
+        for key in candidates:
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= best_similarity:
+                best_key, best_similarity = key, similarity
+
+        return best_key
+
+    def __len__(self):
+        return len(self._signatures)
+
+
+_minhasher = None
+
+
+def get_minhasher():
+    global _minhasher
+    if _minhasher is None:
+        _minhasher = MinHasher()
+    return _minhasher
+
+
+def article_signature(title, content):
+    return get_minhasher().signature(f"{title} {content}")
+
+
+def signature_to_bytes(signature):
+    return signature.tobytes() if signature is not None else None
+
+
+def signature_from_bytes(value):
+    return np.frombuffer(bytes(value), dtype=SIGNATURE_DTYPE)
+
+
+def load_stored_signatures(index, source_ids, exclude_urls):
+    """
+    Add the signatures of articles stored by the sources within the rolling lookback, earlier runs
+    of the same day included. Stories already seen then count as duplicates of the new articles.
+    """
+    lookback_days = settings.NEAR_DUPLICATES['LOOKBACK_DAYS']
+    if not lookback_days:
+        return
+
+    stored = Article.objects.filter(
+        source_id__in=source_ids,
+        created__gte=timezone.now() - timedelta(days=lookback_days),
+        minhash__isnull=False,
+        is_active=True,
+    ).exclude(url__in=exclude_urls).values_list("url", "minhash")
+
+    for url, minhash in stored.iterator():
+        signature = signature_from_bytes(minhash)
+        if len(signature) == index.num_perm:
+            index.add(url, signature)
+
+
+def stored_article_signature(article, num_perm):
+    """Signature of an article dict, the one stored with it when there is one of the current length"""
+    if article.get('minhash') is not None:
+        signature = signature_from_bytes(article['minhash'])
+        if len(signature) == num_perm:
+            return signature
+    return article_signature(article.get('title', ''), article.get('content', ''))
+
+
+def drop_near_duplicates(articles, source_ids=None):
+    """
+    Keep one article per cluster of near-duplicates, the first one in the given order.
+    With source_ids, articles of those sources stored within the lookback are part of the index as well,
+    so a story already reported is dropped when it comes back under another url.
+    """
+    index = LSHIndex()
+
+    if source_ids:
+        # Stored articles come back with their normalized url as source, they are not their own duplicate
+        urls = [article['source'] for article in articles if article.get('source')]
+        load_stored_signatures(index, source_ids, urls)
+
+    unique_articles = []
+    for position, article in enumerate(articles):
+        signature = stored_article_signature(article, index.num_perm)
+        if signature is None:
+            unique_articles.append(article)
+            continue
+
+        if index.query(signature) is not None:
+            continue
+
+        index.add(position, signature)
+        unique_articles.append(article)
+
+    return unique_articles
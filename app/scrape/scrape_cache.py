@@ -0,0 +1,109 @@
+import time
+from datetime import datetime
+
+from django.core.cache import caches
+
+from app.global_constants import TOPIC_TRENDS_RSS_URLS
+from app.scrape.article_store import store_articles, get_recent_articles, dedupe_articles
+from app.scrape.fetch_engine import FetchEngine
+from app.scrape.near_duplicates import drop_near_duplicates
+from app.source.models import Source
+
+
+def get_scrape_cache():
+    return caches['scrape']
+
+
+def current_window():
+    """Index of the current cache window, entries of a window are shared by every reader"""
+    return int(time.time() // get_scrape_cache().default_timeout)
+
+
+def window_start(window):
+    """Start time of a cache window"""
+    return datetime.fromtimestamp(window * get_scrape_cache().default_timeout)
+
+
+def _source_key(source_id, window):
+    return f"scrape:source:{source_id}:{window}"
+
+
+def _trends_key(topic_id, window):
+    return f"scrape:trends:{topic_id}:{window}"
+
+
+def get_topic_articles(topic_ids, window=None):
+    """
+    Articles of every active source of the given topics.
+    Sources scraped in the window (current one by default) are read from the cache, only the missing ones are fetched.
+    """
+    cache = get_scrape_cache()
+    if window is None:
+        window = current_window()
+
+    sources = list(
+        Source.objects.filter(topic_id__in=topic_ids, is_active=True).order_by("topic_id", "id")
+        .values_list("id", "url", "source_type"))
+
+    keys = {source_id: _source_key(source_id, window) for source_id, _, _ in sources}
+    cached = cache.get_many(keys.values())
+
+    missing = [source for source in sources if keys[source[0]] not in cached]
+    if missing:
+        # Sources stored by another process in this window are read from the article table
+        stored = get_recent_articles([source_id for source_id, _, _ in missing], window_start(window))
+        fresh = {keys[source_id]: stored[source_id] for source_id, _, _ in missing if source_id in stored}
+
+        to_scrape = [source for source in missing if source[0] not in stored]
+        if to_scrape:
+            results = FetchEngine().scrape([(url, source_type) for _, url, source_type in to_scrape])
+            for (source_id, _, _), source_articles in zip(to_scrape, results):
+                fresh[keys[source_id]] = store_articles(source_id, source_articles)
+
+        cache.set_many(fresh)
+        cached.update(fresh)
+
+    articles = []
+    for source_id, _, _ in sources:
+        articles.extend(cached.get(keys[source_id], []))
+
+    # The same story reached through several sources is only processed once,
+    # rewritten copies and stories stored within the lookback included
+    return drop_near_duplicates(dedupe_articles(articles), [source_id for source_id, _, _ in sources])
+
+
+def get_topic_trends(topic_ids, window=None):
+    """Trends to watch for the given topics, feeds fetched in the window (current one by default) are read from the cache"""
+    cache = get_scrape_cache()
+    if window is None:
+        window = current_window()
+
+    topic_ids = [topic_id for topic_id in topic_ids if topic_id in TOPIC_TRENDS_RSS_URLS]
+
+    keys = {topic_id: _trends_key(topic_id, window) for topic_id in topic_ids}
+    cached = cache.get_many(keys.values())
+
+    missing = [topic_id for topic_id in topic_ids if keys[topic_id] not in cached]
+    if missing:
+        results = FetchEngine().trends([TOPIC_TRENDS_RSS_URLS[topic_id] for topic_id in missing])
+
+        fresh = {keys[topic_id]: trends for topic_id, trends in zip(missing, results)}
+        cache.set_many(fresh)
+        cached.update(fresh)
+
+    trends = []
+    for topic_id in topic_ids:
+        trends.extend(cached.get(keys[topic_id], []))
+
+    return trends
+
+
+def warm_topic_cache(topic_ids):
+    """
+    Scrape the sources and trends of the topics once so later readers hit the cache.
+    Returns the window that was filled, a long running job keeps reading it even after the clock moves on.
+    """
+    window = current_window()
+    get_topic_articles(topic_ids, window)
+    get_topic_trends(topic_ids, window)
+    return window
@@ -1,88 +1,148 @@
+import codecs
+import re
+
 import feedparser
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta, timezone
+from django.conf import settings
+
+from app.scrape.content_cache import article_content_cache
+from app.scrape.content_extractor import ContentExtractor
+from app.scrape.http_client import http_get, conditional_get
+
+CHARSET_PATTERN = re.compile(rb'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
 
 
 def get_article_content_safe(url):
-    """Safely get article content with error handling"""
+    """Safely get article content with error handling, extracted text is cached per normalized url"""
+    content = article_content_cache.get(url)
+    if content is not None:
+        return content
+
+    content = fetch_article_content(url)
+    if content:
+        article_content_cache.set(url, content)
+
+    return content
+
+
+def is_html_content_type(content_type):
+    """True when a Content-Type header is missing or announces an HTML page"""
+    if not content_type:
+        return True
+    return content_type.split(';')[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def detect_encoding(head, content_type=""):
+    """Charset of the Content-Type header or of the meta tag in the first bytes, utf-8 otherwise"""
+    match = CHARSET_PATTERN.search(content_type.encode('latin-1', 'ignore')) or CHARSET_PATTERN.search(head[:2048])
+    if match:
+        encoding = match.group(1).decode('ascii')
+        try:
+            codecs.lookup(encoding)
+            return encoding
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+def fetch_article_content(url):
+    """
+    Stream an article and extract its main text, empty string on failure.
+    Non-HTML payloads are skipped, at most SCRAPE_HTTP['MAX_ARTICLE_BYTES'] are read
+    and the download stops as soon as the extractor has enough text.
+    """
+    max_bytes = settings.SCRAPE_HTTP['MAX_ARTICLE_BYTES']
+
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-
-        response = requests.get(url, headers=headers, verify=False, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Try to extract main content with comprehensive selectors
-        content_selectors = [
-            # News site specific selectors
-            '.article-body p',
-            '.story-body p',
-            '.article-content p',
-            '.post-content p',
-            '.entry-content p',
-            '.content p',
-            '.story p',
-            '.article p',
-            'article p',
-            'main p',
-            '.main p',
-            # Generic selectors
-            'p'
-        ]
-
-        for selector in content_selectors:
-            paragraphs = soup.select(selector)
-            if paragraphs:
-                content_parts = []
-                for p in paragraphs[:5]:  # First 5 paragraphs for better context
-                    text = p.get_text(strip=True)
-                    if len(text) > 50:  # Longer minimum for better content
-                        content_parts.append(text)
-
-                if content_parts and len(' '.join(content_parts)) > 200:
-                    return ' '.join(content_parts)
-
-        # Try to get content from meta description as fallback
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            desc = meta_desc.get('content').strip()
-            if len(desc) > 100:
-                return desc
-
-        # Final fallback: get all text and clean it
-        text = soup.get_text()
-        if len(text) > 100:
-            # Clean up the text
-            lines = text.split('\n')
-            clean_lines = [line.strip() for line in lines if len(line.strip()) > 50]
-            if clean_lines:
-                return ' '.join(clean_lines[:3])  # First 3 substantial lines
+        with http_get(url, verify=False, stream=True) as response:
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '')
+            if not is_html_content_type(content_type):
+                print(f"     ⚠️ Skipping non-HTML content ({content_type}) from {url}")
+                return ""
+
+            # Single pass over the markup, candidate containers are scored while it downloads
+            extractor = ContentExtractor()
+            decoder = None
+            received = 0
+
+            for chunk in response.iter_content(chunk_size=settings.SCRAPE_HTTP['CHUNK_SIZE']):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(detect_encoding(chunk, content_type))(errors='replace')
+
+                chunk = chunk[:max_bytes - received]
+                received += len(chunk)
+                extractor.feed(decoder.decode(chunk))
+
+                if received >= max_bytes or extractor.has_enough_text():
+                    break
+
+            if decoder is not None:
+                extractor.feed(decoder.decode(b'', final=True))
+
+            return extractor.result()
 
     except Exception as e:
         print(f"     ⚠️ Error getting content from {url}: {e}")
 
     return ""
 
-def scrape_api_source(url, headers, max_articles=5):
-    """Scrape from API source (like Hacker News)"""
+
+def build_article(stub, content=None):
+    """Turn a listing stub and its fetched content into an article dict, None if nothing usable"""
+    if stub.get('content'):
+        content = stub['content']
+
+    fallback = stub.get('fallback')
+    if fallback and (not content or len(content) < 100):
+        content = fallback
+
+    if not content:
+        return None
+
+    return {
+        'source': stub['source'],
+        'title': stub['title'],
+        'content': content[:1500],
+        'published': stub['published']
+    }
+
+
+def complete_articles(stubs, max_articles=5):
+    """Fetch article bodies for listing stubs one by one and build the article dicts"""
     articles = []
 
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+    for stub in stubs:
+
+        if len(articles) >= max_articles:
+            break  # Stop once we hit the limit
+
+        content = None
+        if stub.get('content') is None:
+            content = get_article_content_safe(stub['source'])
+
+        article = build_article(stub, content)
+        if article:
+            articles.append(article)
+            print(f"   ✅ Found: {article['title'][:50]}...")
+
+    return articles
+
 
-        data = response.json()
+def list_api_source(url, headers=None, max_articles=5):
+    """List article stubs from API source (like Hacker News)"""
+    stubs = []
+
+    try:
+        data = conditional_get(url, lambda response: response.json(), headers=headers)
 
         if 'hits' in data:
             for hit in data['hits'][:5]:
 
-                if len(articles) >= max_articles:
-                    break  # Stop once we hit the limit
-
                 title = hit.get('title', '')
                 url = hit.get('url', '')
                 points = hit.get('points', 0)
@@ -90,40 +150,35 @@ def scrape_api_source(url, headers, max_articles=5):
 
                 # if title and url and points > 5:  # Only articles with some engagement
                 if title and url:
-                    # Get content from the article
-                    content = get_article_content_safe(url)
-
-                    if content:
-                        articles.append({
-                            'source': url,
-                            'title': title,
-                            'content': content[:1500],
-                            'published': created_at
-                        })
-                        print(f"   ✅ Found: {title[:50]}...")
+                    # Content is fetched from the article itself
+                    stubs.append({
+                        'source': url,
+                        'title': title,
+                        'content': None,
+                        'published': created_at
+                    })
 
     except Exception as e:
         print(f"   ⚠️ API scraping error: {e}")
 
-    return articles
+    return stubs
 
 
-def scrape_reddit_source(url, headers, max_articles=5):
-    """Scrape from Reddit source"""
-    articles = []
+def scrape_api_source(url, headers=None, max_articles=5):
+    """Scrape from API source (like Hacker News)"""
+    return complete_articles(list_api_source(url, headers, max_articles), max_articles)
 
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
 
-        data = response.json()
+def list_reddit_source(url, headers=None, max_articles=5):
+    """List article stubs from Reddit source"""
+    stubs = []
+
+    try:
+        data = conditional_get(url, lambda response: response.json(), headers=headers)
 
         if 'data' in data and 'children' in data['data']:
             for post in data['data']['children'][:5]:
 
-                if len(articles) >= max_articles:
-                    break  # Stop once we hit the limit
-
                 post_data = post.get('data', {})
                 title = post_data.get('title', '')
                 url = post_data.get('url', '')
@@ -131,83 +186,96 @@ def scrape_reddit_source(url, headers, max_articles=5):
                 selftext = post_data.get('selftext', '')
 
                 if title and url and score > 10:  # Only posts with some engagement
-                    # Try to get real content from the external URL
-                    if selftext and len(selftext) > 100:
-                        content = selftext
-                    else:
-                        # Fetch content from the external article URL
-                        content = get_article_content_safe(url)
-                        if not content or len(content) < 100:
-                            content = f"Recent news: {title}. This article discusses important developments in the field."
-
-                    articles.append({
+                    # Use the self text when it is long enough, otherwise fetch the external article URL
+                    stubs.append({
                         'source': url,
                         'title': title,
-                        'content': content[:1500],
+                        'content': selftext if selftext and len(selftext) > 100 else None,
+                        'fallback': f"Recent news: {title}. This article discusses important developments in the field.",
                         'published': None
                     })
-                    print(f"   ✅ Found: {title[:50]}...")
 
     except Exception as e:
         print(f"   ⚠️ Reddit scraping error: {e}")
 
-    return articles
+    return stubs
 
 
-def scrape_arxiv_source(url, headers, max_articles=5):
-    """Scrape from ArXiv source"""
-    articles = []
+def scrape_reddit_source(url, headers=None, max_articles=5):
+    """Scrape from Reddit source"""
+    return complete_articles(list_reddit_source(url, headers, max_articles), max_articles)
+
+
+def parse_arxiv_entries(response):
+    """Parse an ArXiv Atom response into title, summary and url dicts"""
+    entries = []
+
+    # Parse XML response
+    from xml.etree import ElementTree as ET
+    root = ET.fromstring(response.content)
+
+    # ArXiv namespace
+    ns = {'atom': 'http://www.w3.org/2005/Atom'}
+
+    for entry in root.findall('atom:entry', ns):
+        title_elem = entry.find('atom:title', ns)
+        summary_elem = entry.find('atom:summary', ns)
+        link_elem = entry.find('atom:link[@type="text/html"]', ns)
+
+        if title_elem is not None and summary_elem is not None:
+            entries.append({
+                'title': title_elem.text.strip(),
+                'summary': summary_elem.text.strip(),
+                'url': link_elem.get('href') if link_elem is not None else ''
+            })
+
+    return entries
+
 
+def parse_feed_entries(response):
+    """Parse an RSS / Atom response with feedparser, returns the entries"""
+    return feedparser.parse(response.content).entries
+
+
+def list_arxiv_source(url, headers=None, max_articles=5):
+    """List article stubs from ArXiv source, the abstract is used as content"""
+    stubs = []
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        # Parse XML response
-        from xml.etree import ElementTree as ET
-        root = ET.fromstring(response.content)
-
-        # ArXiv namespace
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
-
-        for entry in root.findall('atom:entry', ns)[:max_articles]:
-            title_elem = entry.find('atom:title', ns)
-            summary_elem = entry.find('atom:summary', ns)
-            link_elem = entry.find('atom:link[@type="text/html"]', ns)
-
-            if title_elem is not None and summary_elem is not None:
-                title = title_elem.text.strip()
-                summary = summary_elem.text.strip()
-                url = link_elem.get('href') if link_elem is not None else ''
-
-                articles.append({
-                    'source': url,
-                    'title': title,
-                    'content': summary[:1500],
-                    'published': None
-                })
-                print(f"   ✅ Found: {title[:50]}...")
+        for entry in conditional_get(url, parse_arxiv_entries, headers=headers)[:max_articles]:
+            stubs.append({
+                'source': entry['url'],
+                'title': entry['title'],
+                'content': entry['summary'],
+                'published': None
+            })
 
     except Exception as e:
         print(f"   ⚠️ ArXiv scraping error: {e}")
 
-    return articles
+    return stubs
 
-def scrape_rss_source(url, max_articles=5):
+
+def scrape_arxiv_source(url, headers=None, max_articles=5):
+    """Scrape from ArXiv source"""
+    return complete_articles(list_arxiv_source(url, headers, max_articles), max_articles)
+
+
+def list_rss_source(url, headers=None, max_articles=5):
     """
-    Scrape articles from an RSS feed (e.g. 404media.co/rss)
-    Returns a list of dicts with: source, title, content, published
+    List article stubs from an RSS feed (e.g. 404media.co/rss)
+    Only entries from the last 7 days are kept.
     """
 
-    articles = []
+    stubs = []
     seen_links = set()
     now = datetime.now(timezone.utc)
 
     try:
-        feed = feedparser.parse(url)
-        print(f"🔍 Found {len(feed.entries)} items in {url}")
+        entries = conditional_get(url, parse_feed_entries, headers=headers)
+        print(f"🔍 Found {len(entries)} items in {url}")
 
-        for entry in feed.entries[:max_articles]:
+        for entry in entries[:max_articles]:
             link = entry.get("link")
             title = entry.get("title", "").strip()
 
@@ -229,31 +297,30 @@ def scrape_rss_source(url, max_articles=5):
             if (now - published_parsed) > timedelta(days=7):
                 continue
 
-            # Fetch full article content (your existing helper)
-            content = get_article_content_safe(link)
-
-            # Skip empty content
-            if not content:
-                continue
-
-            articles.append({
+            # Full article content is fetched from the link
+            stubs.append({
                 "source": link,
                 "title": title,
-                "content": content[:1500],
+                "content": None,
                 "published": published_parsed.isoformat()
             })
 
-            print(f"   ✅ Collected: {title[:70]}")
-
     except Exception as e:
         print(f"⚠️ RSS scraping error for {url}: {e}")
 
-    print(f"📰 Total collected: {len(articles)}")
-    return articles
+    return stubs
 
 
-import feedparser
-from bs4 import BeautifulSoup
+def scrape_rss_source(url, max_articles=5):
+    """
+    Scrape articles from an RSS feed (e.g. 404media.co/rss)
+    Returns a list of dicts with: source, title, content, published
+    """
+
+    articles = complete_articles(list_rss_source(url, max_articles=max_articles), max_articles)
+
+    print(f"📰 Total collected: {len(articles)}")
+    return articles
 
 
 def get_trends_to_watch(rss_url, top_n=5, summary_length=150):
@@ -269,10 +336,15 @@ def get_trends_to_watch(rss_url, top_n=5, summary_length=150):
     Returns:
         List[dict]: List of trend entries with title, summary, link
     """
-    feed = feedparser.parse(rss_url)
     trends = []
 
-    for entry in feed.entries[:top_n]:
+    try:
+        entries = conditional_get(rss_url, parse_feed_entries)
+    except Exception as e:
+        print(f"⚠️ Trends fetch error for {rss_url}: {e}")
+        return trends
+
+    for entry in entries[:top_n]:
         title = entry.title
         link = entry.link
         # Clean summary HTML
@@ -1,3 +1,220 @@
-from django.test import TestCase
+import random
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from app.scrape import near_duplicates
+from app.scrape.article_store import store_articles
+from app.scrape.content_extractor import ContentExtractor, extract_article_text
+from app.scrape.models import Article
+from app.scrape.near_duplicates import LSHIndex, MinHasher, drop_near_duplicates
+from app.source.models import Source, SourceType
+from app.topic.models import Topic
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "html"
+
+
+def paragraphs(label, count):
+    return "".join(
+        f"<p>{label} paragraph {index} with enough words in it to count as a real paragraph of the article.</p>"
+        for index in range(count)
+    )
+
+
+def feed_in_chunks(html, chunk_size):
+    extractor = ContentExtractor()
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+    return extractor.result()
+
+
+class ContentExtractorTests(SimpleTestCase):
+
+    def test_highest_priority_container_wins(self):
+        html = f'<main>{paragraphs("Teaser", 5)}<div class="article-body">{paragraphs("Body", 3)}</div></main>'
+
+        text = extract_article_text(html)
+
+        self.assertTrue(text.startswith("Body paragraph 0"))
+        self.assertNotIn("Teaser", text)
+
+    def test_first_five_paragraphs_of_a_container(self):
+        text = extract_article_text(f'<div class="entry-content">{paragraphs("Entry", 8)}</div>')
+
+        self.assertIn("Entry paragraph 4", text)
+        self.assertNotIn("Entry paragraph 5", text)
+
+    def test_short_paragraphs_and_skipped_elements_are_ignored(self):
+        html = (
+            '<article><p>Too short.</p><script>var ignored = "not article text at all, only code";</script>'
+            f'{paragraphs("Story", 4)}</article>'
+        )
+
+        text = extract_article_text(html)
+
+        self.assertNotIn("Too short", text)
+        self.assertNotIn("ignored", text)
+        self.assertIn("Story paragraph 3", text)
+
+    def test_meta_description_fallback(self):
+        description = "A description of the page that is long enough to stand in for the article text " * 2
+        html = f'<html><head><meta name="description" content="{description}"></head><body><p>Short.</p></body></html>'
+
+        self.assertEqual(extract_article_text(html), description.strip())
+
+    def test_plain_text_fallback(self):
+        line = "A line of plain text that is long enough to be kept by the fallback"
+        html = f"<html><body><div>{line} one\n{line} two\nshort\n{line} three\n{line} four\n</div></body></html>"
+
+        self.assertEqual(extract_article_text(html), f"{line} one {line} two {line} three")
+
+    def test_nothing_usable(self):
+        self.assertEqual(extract_article_text("<html><body><p>Hi</p></body></html>"), "")
+
+    def test_chunked_feeding_matches_whole_document(self):
+        for fixture in sorted(FIXTURES_DIR.glob("*.html")):
+            html = fixture.read_text(encoding="utf-8")
+            expected = extract_article_text(html)
+            for chunk_size in (1, 7, 512, 4096):
+                with self.subTest(fixture=fixture.name, chunk_size=chunk_size):
+                    self.assertEqual(feed_in_chunks(html, chunk_size), expected)
+
+    def test_text_node_split_across_chunks_keeps_its_spaces(self):
+        html = f'<div class="article-body">{paragraphs("Split", 5)}</div>'
+        split_at = html.index("enough words") + len("enough")
+
+        extractor = ContentExtractor()
+        extractor.feed(html[:split_at])
+        extractor.feed(html[split_at:])
+
+        self.assertEqual(extractor.result(), extract_article_text(html))
+        self.assertIn("enough words", extractor.result())
+
+
+def stream_until_enough(html, chunk_size):
+    """Feed like fetch_article_content, returns the text and how many characters were read"""
+    extractor = ContentExtractor()
+    read = 0
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+        read = start + chunk_size
+        if extractor.has_enough_text():
+            break
+    return extractor.result(), min(read, len(html))
+
+
+class EarlyStopTests(SimpleTestCase):
+
+    def test_streamed_fixtures_match_full_parse(self):
+        for fixture in sorted(FIXTURES_DIR.glob("*.html")):
+            html = fixture.read_text(encoding="utf-8")
+            with self.subTest(fixture=fixture.name):
+                self.assertEqual(stream_until_enough(html, 1024)[0], extract_article_text(html))
+
+    def test_keeps_reading_while_a_higher_priority_container_can_appear(self):
+        html = (
+            f'<main>{paragraphs("Teaser", 5)}<aside>{"<a href=/x>link</a>" * 200}</aside>'
+            f'<div class="article-body">{paragraphs("Body", 3)}</div></main>'
+        )
+
+        text, _ = stream_until_enough(html, 256)
+
+        self.assertTrue(text.startswith("Body paragraph 0"))
+
+    def test_stops_once_the_best_container_has_closed(self):
+        trailing = '<div class="footer"><a href="/x">link</a></div>' * 2000
+        for container in ("article-body", "entry-content", "post-content"):
+            html = f'<div class="{container}">{paragraphs("Entry", 8)}</div>{trailing}'
+            with self.subTest(container=container):
+                text, read = stream_until_enough(html, 8192)
+                self.assertEqual(text, extract_article_text(html))
+                self.assertLess(read, len(html) // 5)
+
+
+def story(seed, words=300):
+    """Random text of a story, the same seed gives the same text"""
+    generator = random.Random(seed)
+    return " ".join(f"w{generator.randrange(3000)}" for _ in range(words))
+
+
+def rewrite(text, changes=3):
+    """The same story with a few words changed"""
+    words = text.split()
+    for index in range(0, changes * 40, 40):
+        words[index] = "changed"
+    return " ".join(words)
+
+
+class NearDuplicateTests(SimpleTestCase):
+
+    def test_signatures_are_stable_across_hashers(self):
+        text = story(1)
+
+        self.assertTrue((MinHasher().signature(text) == MinHasher().signature(text)).all())
+        self.assertIsNone(MinHasher().signature("!!!"))
+
+    def test_lsh_index_finds_near_duplicates_only(self):
+        hasher = MinHasher()
+        index = LSHIndex()
+        index.add("original", hasher.signature(story(1)))
+        index.add("other", hasher.signature(story(2)))
+
+        self.assertEqual(index.query(hasher.signature(rewrite(story(1)))), "original")
+        self.assertIsNone(index.query(hasher.signature(story(3))))
+        self.assertEqual(len(index), 2)
+
+    def test_drop_near_duplicates_keeps_the_first_of_each_story(self):
+        articles = [
+            {"source": "https://a.com/1", "title": "Story", "content": story(1)},
+            {"source": "https://b.com/2", "title": "Other", "content": story(2)},
+            {"source": "https://c.com/3", "title": "Story", "content": rewrite(story(1))},
+            {"source": "https://d.com/4", "title": "", "content": ""},
+        ]
+
+        kept = drop_near_duplicates(articles)
+
+        self.assertEqual([article["source"] for article in kept], ["https://a.com/1", "https://b.com/2", "https://d.com/4"])
+
+
+class StoredNearDuplicateTests(TestCase):
+
+    def setUp(self):
+        source_type = SourceType.objects.create(name="RSS")
+        self.source = Source.objects.create(
+            name="Feed", url="https://feed.example.com", topic=Topic.objects.create(name="AI"), source_type=source_type
+        )
+
+    def test_story_stored_earlier_the_same_day_is_a_duplicate(self):
+        store_articles(self.source.pk, [{"source": "https://a.com/1", "title": "Story", "content": story(1)}])
+        Article.objects.update(created=timezone.now() - timedelta(hours=6))
+
+        fresh = store_articles(self.source.pk, [
+            {"source": "https://b.com/2", "title": "Story", "content": rewrite(story(1))},
+            {"source": "https://c.com/3", "title": "Other", "content": story(2)},
+        ])
+
+        kept = drop_near_duplicates(fresh, [self.source.pk])
+
+        self.assertEqual([article["source"] for article in kept], ["https://c.com/3"])
+
+    def test_stories_outside_the_lookback_are_not_compared(self):
+        store_articles(self.source.pk, [{"source": "https://a.com/1", "title": "Story", "content": story(1)}])
+        Article.objects.update(created=timezone.now() - timedelta(days=30))
+
+        fresh = store_articles(self.source.pk, [{"source": "https://b.com/2", "title": "Story", "content": rewrite(story(1))}])
+
+        self.assertEqual(len(drop_near_duplicates(fresh, [self.source.pk])), 1)
+
+    def test_stored_signatures_are_reused(self):
+        fresh = store_articles(self.source.pk, [
+            {"source": f"https://a.com/{seed}", "title": "Story", "content": story(seed)} for seed in range(5)
+        ])
+
+        with mock.patch.object(near_duplicates, "article_signature", wraps=near_duplicates.article_signature) as signature:
+            kept = drop_near_duplicates(fresh, [self.source.pk])
+
+        self.assertEqual(len(kept), 5)
+        signature.assert_not_called()
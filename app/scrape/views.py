@@ -2,7 +2,7 @@ from rest_framework import status
 from rest_framework.generics import GenericAPIView
 
 from app.global_constants import SourceTypeConstants, SuccessMessage
-from app.scrape.scrape_utils import scrape_api_source, scrape_reddit_source, scrape_arxiv_source, scrape_rss_source
+from app.scrape.fetch_engine import scrape_sources
 from app.source.models import Source
 from app.utils import get_response_schema
 from permissions import IsUser
@@ -27,14 +27,7 @@ class ApiScrapeAPIView(GenericAPIView):
 
         api_urls = list(Source.objects.filter(source_type=SourceTypeConstants.API.value, is_active=True).values_list("url", flat=True))
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-
-        articles = []
-
-        for url in api_urls:
-            articles.extend(scrape_api_source(url, headers))
+        articles = scrape_sources([(url, SourceTypeConstants.API.value) for url in api_urls])
 
 
         return get_response_schema(articles, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
@@ -45,14 +38,7 @@ class RedditScrapeAPIView(GenericAPIView):
     def post(self, request):
         api_urls = list(Source.objects.filter(source_type=SourceTypeConstants.REDDIT.value, is_active=True).values_list("url", flat=True))
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-
-        articles = []
-
-        for url in api_urls:
-            articles.extend(scrape_reddit_source(url, headers))
+        articles = scrape_sources([(url, SourceTypeConstants.REDDIT.value) for url in api_urls])
 
         return get_response_schema(articles, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
@@ -62,14 +48,7 @@ class ArvixScrapeAPIView(GenericAPIView):
     def post(self, request):
         api_urls = list(Source.objects.filter(source_type=SourceTypeConstants.ARXIV.value, is_active=True).values_list("url", flat=True))
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-
-        articles = []
-
-        for url in api_urls:
-            articles.extend(scrape_arxiv_source(url, headers))
+        articles = scrape_sources([(url, SourceTypeConstants.ARXIV.value) for url in api_urls])
 
         return get_response_schema(articles, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
@@ -78,10 +57,7 @@ class RSSScrapeAPIView(GenericAPIView):
     def post(self, request):
         api_urls = list(Source.objects.filter(source_type=SourceTypeConstants.RSS.value, is_active=True).values_list("url", flat=True))
 
-        articles = []
-
-        for url in api_urls:
-            articles.extend(scrape_rss_source(url))
+        articles = scrape_sources([(url, SourceTypeConstants.RSS.value) for url in api_urls])
 
         return get_response_schema(articles, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
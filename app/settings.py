@@ -248,6 +248,159 @@ DEBUG_TOOLBAR_CONFIG = {
 }
 
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Scraped articles and trends per source, shared by every user of a topic
+    'scrape': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'scrape',
+        'TIMEOUT': int(os.getenv('SCRAPE_CACHE_TTL', 900)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SCRAPE_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+    # Extracted article text per normalized url, second tier of ARTICLE_CONTENT_CACHE
+    'article_content': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('ARTICLE_CONTENT_CACHE_DIR', str(BASE_DIR / '.cache' / 'article_content')),
+        'TIMEOUT': int(os.getenv('ARTICLE_CONTENT_CACHE_TTL', 24 * 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('ARTICLE_CONTENT_CACHE_MAX_ENTRIES', 5000)),
+        },
+    },
+    # ETag / Last-Modified validators and parsed payload of feeds and listing APIs, per url
+    'http': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'http',
+        'TIMEOUT': int(os.getenv('HTTP_VALIDATOR_CACHE_TTL', 7 * 24 * 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('HTTP_VALIDATOR_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+    # Parsed newsletter JSON per hash of the model and normalized prompt
+    'llm': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'llm',
+        'TIMEOUT': int(os.getenv('LLM_CACHE_TTL', 6 * 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('LLM_CACHE_MAX_ENTRIES', 500)),
+        },
+    },
+}
+
+# Article text cache, in-process LRU in front of the 'article_content' cache
+ARTICLE_CONTENT_CACHE = {
+    'MEMORY_MAX_ENTRIES': int(os.getenv('ARTICLE_CONTENT_MEMORY_MAX_ENTRIES', 512)),
+    'TTL': int(os.getenv('ARTICLE_CONTENT_CACHE_TTL', 24 * 60 * 60)),
+}
+
+# Scrape engine
+SCRAPE_ENGINE = {
+    # Total number of requests in flight across all sources
+    'MAX_CONCURRENCY': int(os.getenv('SCRAPE_MAX_CONCURRENCY', 16)),
+    # Requests in flight against a single host
+    'PER_HOST_CONCURRENCY': int(os.getenv('SCRAPE_PER_HOST_CONCURRENCY', 4)),
+}
+
+
+# Outbound HTTP for scraping
+SCRAPE_HTTP = {
+    'USER_AGENT': os.getenv('SCRAPE_USER_AGENT', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'),
+    'TIMEOUT': float(os.getenv('SCRAPE_HTTP_TIMEOUT', 10)),
+    # Number of hosts to keep connection pools for
+    'POOL_CONNECTIONS': int(os.getenv('SCRAPE_HTTP_POOL_CONNECTIONS', 20)),
+    # Keep-alive connections per host, should not be lower than SCRAPE_ENGINE['PER_HOST_CONCURRENCY']
+    'POOL_MAXSIZE': int(os.getenv('SCRAPE_HTTP_POOL_MAXSIZE', 10)),
+    'MAX_RETRIES': int(os.getenv('SCRAPE_HTTP_MAX_RETRIES', 0)),
+    # Article pages are streamed, reading stops after this many bytes
+    'MAX_ARTICLE_BYTES': int(os.getenv('SCRAPE_MAX_ARTICLE_BYTES', 1024 * 1024)),
+    'CHUNK_SIZE': int(os.getenv('SCRAPE_HTTP_CHUNK_SIZE', 16 * 1024)),
+}
+
+
+# Near-duplicate article detection (MinHash + LSH)
+NEAR_DUPLICATES = {
+    # Words per shingle
+    'SHINGLE_SIZE': int(os.getenv('NEAR_DUPLICATE_SHINGLE_SIZE', 5)),
+    # Signature length, must be a multiple of BANDS, changing it invalidates the stored signatures
+    'NUM_PERM': int(os.getenv('NEAR_DUPLICATE_NUM_PERM', 64)),
+    'BANDS': int(os.getenv('NEAR_DUPLICATE_BANDS', 16)),
+    # Estimated Jaccard similarity from which two articles are the same story
+    'THRESHOLD': float(os.getenv('NEAR_DUPLICATE_THRESHOLD', 0.7)),
+    # Rolling window in days of stored articles a new article is compared with, 0 only dedups within a run
+    'LOOKBACK_DAYS': int(os.getenv('NEAR_DUPLICATE_LOOKBACK_DAYS', 3)),
+}
+
+
+# Curation prompt size, see app/newsletter/token_budget.py
+LLM_BUDGET = {
+    'MAX_PROMPT_TOKENS': int(os.getenv('LLM_MAX_PROMPT_TOKENS', 3000)),
+    # Ranked candidate articles, the prompt takes them in relevance order while the budget lasts
+    'MAX_ARTICLES': int(os.getenv('LLM_MAX_ARTICLES', 10)),
+    # Expected completion size, recorded next to the actual count to tune the budget
+    'EXPECTED_COMPLETION_TOKENS': int(os.getenv('LLM_EXPECTED_COMPLETION_TOKENS', 1200)),
+    # Characters per token of the estimator, about 4 for English prose
+    'CHARS_PER_TOKEN': float(os.getenv('LLM_CHARS_PER_TOKEN', 4)),
+}
+
+
+# Shared Groq client pool, see app/newsletter/llm_client.py
+# API keys come from GROQ_API_KEYS (comma separated) or GROQ_API_KEY, the limits below apply per key
+LLM_CLIENT = {
+    # Requests in flight across all keys
+    'MAX_CONCURRENCY': int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+    'PER_KEY_CONCURRENCY': int(os.getenv('LLM_PER_KEY_CONCURRENCY', 4)),
+    'REQUESTS_PER_MINUTE': int(os.getenv('LLM_REQUESTS_PER_MINUTE', 30)),
+    'TOKENS_PER_MINUTE': int(os.getenv('LLM_TOKENS_PER_MINUTE', 8000)),
+    # Requests waiting or in flight before new ones are rejected, and how long one may wait
+    'MAX_QUEUE': int(os.getenv('LLM_MAX_QUEUE', 64)),
+    'QUEUE_TIMEOUT': float(os.getenv('LLM_QUEUE_TIMEOUT', 300)),
+    # The daily batch waits longer than a user would, and retries when the queue is full
+    'BATCH_QUEUE_TIMEOUT': float(os.getenv('LLM_BATCH_QUEUE_TIMEOUT', 3600)),
+    'BATCH_RETRIES': int(os.getenv('LLM_BATCH_RETRIES', 5)),
+    'BATCH_RETRY_DELAY': float(os.getenv('LLM_BATCH_RETRY_DELAY', 30)),
+}
+
+
+# Background newsletter generation
+NEWSLETTER_JOBS = {
+    'MAX_WORKERS': int(os.getenv('NEWSLETTER_JOB_WORKERS', 4)),
+    # Seconds after which a job still pending or running is taken as lost with its process and failed
+    'TIMEOUT': int(os.getenv('NEWSLETTER_JOB_TIMEOUT', 900)),
+}
+
+# Email outbox, the delivery workers claim due emails in batches instead of the views and schedulers sending inline
+EMAIL_OUTBOX = {
+    'WORKERS': int(os.getenv('EMAIL_OUTBOX_WORKERS', 2)),
+    # emails claimed by a worker at once, sent in batch requests of PROVIDER_BATCH_SIZE (at most 100 for Resend)
+    'BATCH_SIZE': int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 100)),
+    'PROVIDER_BATCH_SIZE': int(os.getenv('EMAIL_OUTBOX_PROVIDER_BATCH_SIZE', 100)),
+    'MAX_ATTEMPTS': int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 3)),
+    # retry n waits BACKOFF_SECONDS * 2 ** (n - 1)
+    'BACKOFF_SECONDS': float(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', 2)),
+    # idle workers look for due retries this often, new emails wake them up at once
+    'POLL_INTERVAL': float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 5)),
+    # a claimed email that is neither sent nor failed after this long is claimed again
+    'CLAIM_TIMEOUT': float(os.getenv('EMAIL_OUTBOX_CLAIM_TIMEOUT', 300)),
+    'FROM_EMAIL': os.getenv('EMAIL_OUTBOX_FROM_EMAIL', 'onboarding@resend.dev'),
+}
+
+# Scheduled newsletters, due schedules are claimed and queued in batches
+NEWSLETTER_SCHEDULES = {
+    'BATCH_SIZE': int(os.getenv('NEWSLETTER_SCHEDULE_BATCH_SIZE', 100)),
+}
+
+# Newsletter HTML, both are applied once when the template is compiled
+NEWSLETTER_HTML = {
+    # copy the style block rules onto the elements for email clients that drop style blocks
+    'INLINE_CSS': os.getenv('NEWSLETTER_HTML_INLINE_CSS', 'false').lower() == 'true',
+    'MINIFY': os.getenv('NEWSLETTER_HTML_MINIFY', 'false').lower() == 'true',
+}
+
+
 # Log Config
 LOGGING = {
     'version': 1,